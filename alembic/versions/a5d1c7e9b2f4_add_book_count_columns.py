@@ -0,0 +1,52 @@
+"""add book_count to genres and authors
+
+Revision ID: a5d1c7e9b2f4
+Revises: f3b9d2c6a4e7
+Create Date: 2026-10-17 15:32:40.771256
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'a5d1c7e9b2f4'
+down_revision = 'f3b9d2c6a4e7'
+branch_labels = None
+depends_on = None
+
+
+# Тот же пересчёт авторов, что в scripts/import_audiobooks.py
+AUTHOR_COUNTS = """
+UPDATE authors a SET book_count = c.n
+FROM (
+    SELECT au.id, count(aa.audiobook_id) AS n
+    FROM authors au LEFT JOIN audiobook_author aa ON aa.author_id = au.id
+    GROUP BY au.id
+) c
+WHERE a.id = c.id AND a.book_count IS DISTINCT FROM c.n
+"""
+
+# Книги, привязанные к самому жанру, — как в его листинге на этой ревизии.
+# Поджанры добавляет d8e2f5a1c6b9 вместе с листингом по поддереву
+GENRE_COUNTS = """
+WITH counts AS (
+    SELECT g.id, count(ag.audiobook_id) AS n
+    FROM genres g LEFT JOIN audiobook_genre ag ON ag.genre_id = g.id
+    GROUP BY g.id
+)
+UPDATE genres g SET book_count = counts.n
+FROM counts
+WHERE g.id = counts.id AND g.book_count IS DISTINCT FROM counts.n
+"""
+
+
+def upgrade() -> None:
+    op.add_column('authors', sa.Column('book_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('genres', sa.Column('book_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(AUTHOR_COUNTS)
+    op.execute(GENRE_COUNTS)
+
+
+def downgrade() -> None:
+    op.drop_column('genres', 'book_count')
+    op.drop_column('authors', 'book_count')
@@ -0,0 +1,123 @@
+"""add audiobook search vector
+
+Revision ID: b7d2e4f1a9c3
+Revises: 9e090454ec7f
+Create Date: 2026-10-17 10:12:40.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'b7d2e4f1a9c3'
+down_revision = '9e090454ec7f'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# Название (A) и авторы (B) — в russian и simple: russian находит словоформы,
+# simple — имена и слова, которых нет в словаре. Описание (C) — только russian.
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION audiobook_search_vector(book_id integer, book_name text, book_description text)
+RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector('russian', coalesce(book_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(book_name, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(authors.names, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(authors.names, '')), 'B') ||
+        setweight(to_tsvector('russian', coalesce(book_description, '')), 'C')
+    FROM (
+        SELECT string_agg(a.name, ' ') AS names
+        FROM audiobook_author aa
+        JOIN authors a ON a.id = aa.author_id
+        WHERE aa.audiobook_id = book_id
+    ) AS authors
+$$ LANGUAGE sql STABLE
+"""
+
+# asyncpg выполняет по одной команде за раз
+TRIGGERS = [
+    """
+CREATE OR REPLACE FUNCTION audiobooks_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := audiobook_search_vector(NEW.id, NEW.name, NEW.description);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+""",
+    """
+CREATE TRIGGER audiobooks_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description ON audiobooks
+    FOR EACH ROW EXECUTE FUNCTION audiobooks_search_vector_update();
+""",
+    """
+CREATE OR REPLACE FUNCTION audiobook_author_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    UPDATE audiobooks
+    SET search_vector = audiobook_search_vector(id, name, description)
+    WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.audiobook_id ELSE NEW.audiobook_id END;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+""",
+    """
+CREATE TRIGGER audiobook_author_search_vector_update
+    AFTER INSERT OR DELETE ON audiobook_author
+    FOR EACH ROW EXECUTE FUNCTION audiobook_author_search_vector_update();
+""",
+    """
+CREATE OR REPLACE FUNCTION authors_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    UPDATE audiobooks b
+    SET search_vector = audiobook_search_vector(b.id, b.name, b.description)
+    FROM audiobook_author aa
+    WHERE aa.audiobook_id = b.id AND aa.author_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+""",
+    """
+CREATE TRIGGER authors_search_vector_update
+    AFTER UPDATE OF name ON authors
+    FOR EACH ROW EXECUTE FUNCTION authors_search_vector_update();
+""",
+]
+
+
+def upgrade() -> None:
+    op.add_column('audiobooks', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(SEARCH_VECTOR_FUNCTION)
+    for statement in TRIGGERS:
+        op.execute(statement)
+
+    # Заполняем пачками по id, фиксируя каждую: без долгой блокировки всей таблицы
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.scalar(sa.text("SELECT max(id) FROM audiobooks")) or 0
+        for start in range(0, max_id + 1, BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE audiobooks SET search_vector = audiobook_search_vector(id, name, description) "
+                    "WHERE id >= :start AND id < :end"
+                ),
+                {"start": start, "end": start + BATCH_SIZE},
+            )
+
+        op.create_index(
+            'ix_audiobooks_search_vector', 'audiobooks', ['search_vector'],
+            unique=False, postgresql_using='gin', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audiobooks_search_vector', table_name='audiobooks')
+    op.execute("DROP TRIGGER IF EXISTS authors_search_vector_update ON authors")
+    op.execute("DROP TRIGGER IF EXISTS audiobook_author_search_vector_update ON audiobook_author")
+    op.execute("DROP TRIGGER IF EXISTS audiobooks_search_vector_update ON audiobooks")
+    op.execute("DROP FUNCTION IF EXISTS authors_search_vector_update()")
+    op.execute("DROP FUNCTION IF EXISTS audiobook_author_search_vector_update()")
+    op.execute("DROP FUNCTION IF EXISTS audiobooks_search_vector_update()")
+    op.execute("DROP FUNCTION IF EXISTS audiobook_search_vector(integer, text, text)")
+    op.drop_column('audiobooks', 'search_vector')
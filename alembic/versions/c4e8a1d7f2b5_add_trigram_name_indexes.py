@@ -0,0 +1,33 @@
+"""add trigram name indexes
+
+Revision ID: c4e8a1d7f2b5
+Revises: b7d2e4f1a9c3
+Create Date: 2026-10-17 11:03:27.905116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c4e8a1d7f2b5'
+down_revision = 'b7d2e4f1a9c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_audiobooks_name_trgm', 'audiobooks', ['name'], unique=False,
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_authors_name_trgm', 'authors', ['name'], unique=False,
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_authors_name_trgm', table_name='authors')
+    op.drop_index('ix_audiobooks_name_trgm', table_name='audiobooks')
@@ -0,0 +1,44 @@
+"""add genre closure table
+
+Revision ID: d8e2f5a1c6b9
+Revises: a5d1c7e9b2f4
+Create Date: 2026-10-17 16:48:03.205117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd8e2f5a1c6b9'
+down_revision = 'a5d1c7e9b2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'genre_closure',
+        sa.Column('ancestor_id', sa.Integer(), nullable=False),
+        sa.Column('descendant_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['genres.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['descendant_id'], ['genres.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    )
+    op.create_index('ix_genre_closure_descendant', 'genre_closure', ['descendant_id', 'depth'], unique=False)
+
+    op.execute("""
+        INSERT INTO genre_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM genres
+            UNION ALL
+            SELECT t.ancestor_id, g.id, t.depth + 1
+            FROM tree t JOIN genres g ON g.parent_id = t.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM tree
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_genre_closure_descendant', table_name='genre_closure')
+    op.drop_table('genre_closure')
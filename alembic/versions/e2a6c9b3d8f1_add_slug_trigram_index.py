@@ -0,0 +1,27 @@
+"""add slug trigram index
+
+Revision ID: e2a6c9b3d8f1
+Revises: c4e8a1d7f2b5
+Create Date: 2026-10-17 12:20:51.447310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e2a6c9b3d8f1'
+down_revision = 'c4e8a1d7f2b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_audiobooks_slug_trgm', 'audiobooks', ['slug'], unique=False,
+            postgresql_using='gin', postgresql_ops={'slug': 'gin_trgm_ops'}, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audiobooks_slug_trgm', table_name='audiobooks')
@@ -0,0 +1,49 @@
+"""recount genre book_count over subtree
+
+Revision ID: e7c3a9f1b5d2
+Revises: d8e2f5a1c6b9
+Create Date: 2026-10-17 18:12:40.518306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e7c3a9f1b5d2'
+down_revision = 'd8e2f5a1c6b9'
+branch_labels = None
+depends_on = None
+
+
+# book_count жанра — разные книги всего поддерева, как в листинге по
+# genre_closure; тот же пересчёт, что в scripts/import_audiobooks.py
+SUBTREE_COUNTS = """
+WITH counts AS (
+    SELECT gc.ancestor_id AS id, count(DISTINCT ag.audiobook_id) AS n
+    FROM genre_closure gc LEFT JOIN audiobook_genre ag ON ag.genre_id = gc.descendant_id
+    GROUP BY gc.ancestor_id
+)
+UPDATE genres g SET book_count = counts.n
+FROM counts
+WHERE g.id = counts.id AND g.book_count IS DISTINCT FROM counts.n
+"""
+
+# Обратно к числу книг самого жанра (как в a5d1c7e9b2f4)
+DIRECT_COUNTS = """
+WITH counts AS (
+    SELECT g.id, count(ag.audiobook_id) AS n
+    FROM genres g LEFT JOIN audiobook_genre ag ON ag.genre_id = g.id
+    GROUP BY g.id
+)
+UPDATE genres g SET book_count = counts.n
+FROM counts
+WHERE g.id = counts.id AND g.book_count IS DISTINCT FROM counts.n
+"""
+
+
+def upgrade() -> None:
+    op.execute(SUBTREE_COUNTS)
+
+
+def downgrade() -> None:
+    op.execute(DIRECT_COUNTS)
@@ -0,0 +1,33 @@
+"""add keyset pagination index
+
+Revision ID: f3b9d2c6a4e7
+Revises: e2a6c9b3d8f1
+Create Date: 2026-10-17 14:05:12.318904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f3b9d2c6a4e7'
+down_revision = 'e2a6c9b3d8f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Списки идут по (created_at DESC, id DESC): составной индекс читается
+    # в обратном порядке и заменяет оба одноколоночных индекса по created_at
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_audiobooks_created_id', 'audiobooks', ['created_at', 'id'], unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index('idx_audiobook_created', table_name='audiobooks', postgresql_concurrently=True)
+        op.drop_index('ix_audiobooks_created_at', table_name='audiobooks', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_audiobooks_created_at', 'audiobooks', ['created_at'], unique=False)
+    op.create_index('idx_audiobook_created', 'audiobooks', ['created_at'], unique=False)
+    op.drop_index('ix_audiobooks_created_id', table_name='audiobooks')
@@ -0,0 +1,411 @@
+"""Индекс подсказок /api/search в памяти процесса.
+
+Для названий книг, имён авторов и названий жанров строится отдельный
+PrefixIndex: отсортированный массив слов и непрерывный массив позиций
+(рангов популярности) для каждого слова. Ответ на подсказку — бинарный
+поиск по словам и проход по уже упорядоченным позициям, без БД.
+
+Индекс строится при старте и обновляется, когда меняется поколение
+каталога (импорт) или версия тега top_books. Из книг подгружаются только
+изменённые после прошлой сборки: импорт ставит updated_at каждой
+загруженной книге и переписывает связи с авторами только у них. Удалённые
+книги updated_at не оставляют, поэтому после смены поколения id индекса
+сверяются с таблицей. Авторы и жанры небольшие и читаются целиком.
+"""
+import asyncio
+import bisect
+import heapq
+import logging
+import re
+import sys
+import time
+from array import array
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select, func
+
+from app.cache import get_catalog_generation, tag_prefix
+from app.config import settings
+from app.database import async_session_maker
+from app.models import Audiobook, Author, Genre, audiobook_author, audiobook_genre
+from app.utils import switch_keyboard_layout
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Для префиксов до этой длины лучшие позиции считаются заранее:
+# под «а» или «кн» подходят тысячи слов
+SHORT_PREFIX_LEN = 3
+TOP_K = 10
+# Сколько кандидатов проверяем на совпадение остальных слов запроса
+MAX_SCAN = 5000
+
+# Сколько мест в выдаче отдаём жанрам и авторам, остальное — книгам
+GENRE_SLOTS = 2
+AUTHOR_SLOTS = 3
+
+# Топовые книги выше любых других: больше любого timestamp
+TOP_BOOST = 1e10
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower().replace("ё", "е"))
+
+
+# Элемент индекса — поля, склеенные через \x1f в одну UTF-8-строку байтов:
+# так запись книги занимает вдвое меньше, чем кортеж из отдельных строк.
+# Первое поле — id, второе — название, по которому ищем.
+SEPARATOR = "\x1f"
+
+
+def pack(*fields) -> bytes:
+    return SEPARATOR.join(str(field).replace(SEPARATOR, " ") for field in fields).encode("utf-8")
+
+
+def unpack(record: bytes) -> list[str]:
+    return record.decode("utf-8").split(SEPARATOR)
+
+
+class PrefixIndex:
+    """Поиск по префиксам слов с выдачей в порядке популярности.
+
+    items отсортированы по убыванию популярности, позиция в списке — ранг.
+    Позиции каждого слова лежат в postings подряд и по возрастанию, а слова
+    отсортированы, поэтому все позиции префикса — один непрерывный срез.
+    """
+    __slots__ = ("items", "words", "offsets", "postings", "top")
+
+    def __init__(self, items: list[bytes]):
+        self.items = items
+
+        by_word: dict[str, list[int]] = {}
+        for rank, record in enumerate(items):
+            for word in set(tokenize(unpack(record)[1])):
+                by_word.setdefault(word, []).append(rank)
+
+        self.words = sorted(by_word)
+        self.offsets = array("I", [0])
+        self.postings = array("I")
+        for word in self.words:
+            self.postings.extend(by_word[word])
+            self.offsets.append(len(self.postings))
+
+        # Лучшие TOP_K каждого слова заведомо содержат лучшие TOP_K префикса
+        top: dict[str, list[int]] = {}
+        for i, word in enumerate(self.words):
+            best = self.postings[self.offsets[i]:min(self.offsets[i + 1], self.offsets[i] + TOP_K)]
+            for n in range(1, min(len(word), SHORT_PREFIX_LEN) + 1):
+                prefix = word[:n]
+                current = top.get(prefix)
+                top[prefix] = heapq.nsmallest(TOP_K, set(current).union(best)) if current else list(best)
+        self.top = {prefix: array("I", ranks) for prefix, ranks in top.items()}
+
+    def _word_range(self, prefix: str) -> tuple[int, int]:
+        lo = bisect.bisect_left(self.words, prefix)
+        hi = bisect.bisect_left(self.words, prefix + "\uffff", lo)
+        return lo, hi
+
+    def _ranks(self, lo: int, hi: int) -> Iterator[int]:
+        """Позиции всех слов диапазона по возрастанию ранга, без повторов."""
+        if hi - lo == 1:
+            yield from self.postings[self.offsets[lo]:self.offsets[hi]]
+            return
+        seen = set()
+        lists = (self.postings[self.offsets[i]:self.offsets[i + 1]] for i in range(lo, hi))
+        for rank in heapq.merge(*lists):
+            if rank not in seen:
+                seen.add(rank)
+                yield rank
+
+    def search(self, words: list[str], limit: int) -> list[list[str]]:
+        """Элементы, в названии которых есть слова с каждым из префиксов."""
+        if limit <= 0:
+            return []
+
+        ranges = []
+        for word in words:
+            lo, hi = self._word_range(word)
+            if lo == hi:
+                return []
+            ranges.append((self.offsets[hi] - self.offsets[lo], word, lo, hi))
+
+        # Кандидаты берём по самому редкому слову, остальные проверяем
+        ranges.sort()
+        _, word, lo, hi = ranges[0]
+        others = [w for _, w, _, _ in ranges[1:]]
+
+        if not others and len(word) <= SHORT_PREFIX_LEN and limit <= TOP_K:
+            return [unpack(self.items[rank]) for rank in self.top.get(word, ())[:limit]]
+
+        found = []
+        for scanned, rank in enumerate(self._ranks(lo, hi)):
+            if scanned >= MAX_SCAN:
+                break
+            fields = unpack(self.items[rank])
+            if others:
+                tokens = tokenize(fields[1])
+                if not all(any(t.startswith(w) for t in tokens) for w in others):
+                    continue
+            found.append(fields)
+            if len(found) >= limit:
+                break
+        return found
+
+    def memory(self) -> dict:
+        """Размер структур в байтах."""
+        return {
+            "entries": len(self.items),
+            "words": len(self.words),
+            "postings": len(self.postings),
+            "words_bytes": sys.getsizeof(self.words) + sum(sys.getsizeof(w) for w in self.words),
+            "postings_bytes": sys.getsizeof(self.postings) + sys.getsizeof(self.offsets),
+            "top_bytes": sys.getsizeof(self.top) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self.top.items()),
+            "items_bytes": sys.getsizeof(self.items) + sum(sys.getsizeof(r) for r in self.items),
+        }
+
+
+# Строка для сборки: (ключ популярности, запись). Чем больше ключ, тем выше
+Row = tuple[float, bytes]
+
+
+class Autocomplete:
+    def __init__(self):
+        self.books: Optional[PrefixIndex] = None
+        self.authors: Optional[PrefixIndex] = None
+        self.genres: Optional[PrefixIndex] = None
+        self.version: Optional[str] = None
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        # Ключи популярности книг в порядке books.items — для пересборки
+        # с изменёнными книгами без повторного чтения остальных из БД
+        self._book_keys = array("d")
+        self._watermark: Optional[datetime] = None
+        self._generation: Optional[int] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.books is not None
+
+    def suggest(self, query: str, limit: int = 10) -> list[dict]:
+        if not self.ready:
+            return []
+        results = self._suggest(tokenize(query), limit)
+        if not results:
+            # Набрано не в той раскладке: «vfcnth» → «мастер»
+            switched = switch_keyboard_layout(query)
+            if switched:
+                results = self._suggest(tokenize(switched), limit)
+        return results
+
+    def _suggest(self, words: list[str], limit: int) -> list[dict]:
+        if not words:
+            return []
+
+        genres = self.genres.search(words, min(GENRE_SLOTS, limit))
+        authors = self.authors.search(words, min(AUTHOR_SLOTS, limit - len(genres)))
+        books = self.books.search(words, limit - len(genres) - len(authors))
+
+        return (
+            [_entity_result("genre", "Жанр", g) for g in genres]
+            + [_entity_result("author", "Автор", a) for a in authors]
+            + [_book_result(b) for b in books]
+        )
+
+    async def _current_version(self) -> tuple[int, str]:
+        # is_top меняется без смены поколения — учитываем и тег top_books
+        generation = await get_catalog_generation()
+        return generation, f"{generation}|{await tag_prefix(('top_books',))}"
+
+    async def ensure_fresh(self):
+        """Запускает обновление в фоне, если каталог изменился."""
+        if not settings.autocomplete_index_enabled:
+            return
+        if self._refresh is not None and not self._refresh.done():
+            return
+        _, version = await self._current_version()
+        if version != self.version:
+            self._refresh = asyncio.create_task(self.refresh())
+            self._refresh.add_done_callback(_log_refresh_error)
+
+    async def refresh(self):
+        generation, version = await self._current_version()
+        full = self.books is None
+        started = time.perf_counter()
+
+        async with async_session_maker() as session:
+            changed, watermark = await _load_books(session, None if full else self._watermark)
+            # Новое поколение: книги могли удалить — оставляем только
+            # те id, что ещё есть в таблице (одни id, без строк книг)
+            existing = None
+            if not full and generation != self._generation:
+                existing = set(await session.scalars(select(Audiobook.id)))
+            authors = await _load_entities(session, Author, audiobook_author.c.author_id)
+            genres = await _load_entities(session, Genre, audiobook_genre.c.genre_id)
+
+        books = list(changed.values()) if full else self._merge_books(changed, existing)
+        # Сортировка и разбор на слова — в потоке, чтобы не держать event loop
+        self.books, self._book_keys, self.authors, self.genres = await asyncio.to_thread(
+            self.build, books, authors, genres
+        )
+        self._watermark = watermark if full else watermark or self._watermark
+        self._generation = generation
+        self.version = version
+        self.built_at = time.time()
+        self.build_seconds = round(time.perf_counter() - started, 3)
+        logger.info(
+            "Autocomplete index: %d books (%d changed), %d authors, %d genres in %.3fs",
+            len(self.books.items), len(changed), len(authors), len(genres), self.build_seconds,
+        )
+
+    def _merge_books(self, changed: dict[int, Row], existing: Optional[set[int]] = None) -> list[Row]:
+        """Текущие книги индекса, в которых заменены изменённые.
+
+        existing — id книг в таблице; остальные книги индекса удалены.
+        """
+        if self.books is None:
+            return list(changed.values())
+        rows = []
+        for key, record in zip(self._book_keys, self.books.items):
+            book_id = int(record.split(SEPARATOR.encode(), 1)[0])
+            if book_id not in changed and (existing is None or book_id in existing):
+                rows.append((key, record))
+        rows.extend(changed.values())
+        return rows
+
+    @staticmethod
+    def build(
+        books: list[Row],
+        authors: list[Row],
+        genres: list[Row],
+    ) -> tuple[PrefixIndex, array, PrefixIndex, PrefixIndex]:
+        books.sort(key=lambda row: -row[0])
+        authors.sort(key=lambda row: -row[0])
+        genres.sort(key=lambda row: -row[0])
+        return (
+            PrefixIndex([record for _, record in books]),
+            array("d", (key for key, _ in books)),
+            PrefixIndex([record for _, record in authors]),
+            PrefixIndex([record for _, record in genres]),
+        )
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "version": self.version,
+            "books": len(self.books.items) if self.books else 0,
+            "authors": len(self.authors.items) if self.authors else 0,
+            "genres": len(self.genres.items) if self.genres else 0,
+            "build_seconds": self.build_seconds,
+        }
+
+    def memory_report(self) -> dict:
+        report = {
+            name: index.memory()
+            for name, index in (("books", self.books), ("authors", self.authors), ("genres", self.genres))
+            if index is not None
+        }
+        report["book_keys_bytes"] = sys.getsizeof(self._book_keys)
+        report["total_bytes"] = report["book_keys_bytes"] + sum(
+            value for part in report.values() if isinstance(part, dict)
+            for key, value in part.items() if key.endswith("_bytes")
+        )
+        return report
+
+    def start(self):
+        if settings.autocomplete_index_enabled and self._refresh is None:
+            self._refresh = asyncio.create_task(self.refresh())
+            self._refresh.add_done_callback(_log_refresh_error)
+
+    async def stop(self):
+        if self._refresh is not None and not self._refresh.done():
+            self._refresh.cancel()
+            try:
+                await self._refresh
+            except asyncio.CancelledError:
+                pass
+
+
+async def _load_books(session, since: Optional[datetime]) -> tuple[dict[int, Row], Optional[datetime]]:
+    """Книги, изменённые после since (все, если since нет), и новая отметка."""
+    query = select(
+        Audiobook.id, Audiobook.name, Audiobook.slug, Audiobook.price, Audiobook.image_url,
+        Audiobook.is_top, Audiobook.created_at, Audiobook.updated_at,
+    )
+    authors_query = (
+        select(audiobook_author.c.audiobook_id, Author.name)
+        .join(Author, Author.id == audiobook_author.c.author_id)
+    )
+    if since is not None:
+        query = query.where(Audiobook.updated_at > since)
+        authors_query = authors_query.join(
+            Audiobook, Audiobook.id == audiobook_author.c.audiobook_id
+        ).where(Audiobook.updated_at > since)
+
+    book_authors: dict[int, list[str]] = {}
+    for book_id, name in await session.execute(authors_query):
+        book_authors.setdefault(book_id, []).append(name)
+
+    rows: dict[int, Row] = {}
+    watermark = None
+    for book_id, name, slug, price, image_url, is_top, created_at, updated_at in await session.execute(query):
+        # Сначала топовые, среди них и остальных — новые
+        key = (TOP_BOOST if is_top else 0) + created_at.timestamp()
+        record = pack(
+            book_id, name, slug, ", ".join(book_authors.get(book_id, ())),
+            float(price) if price else 0, image_url or "",
+        )
+        rows[book_id] = (key, record)
+        if watermark is None or updated_at > watermark:
+            watermark = updated_at
+    return rows, watermark
+
+
+async def _load_entities(session, model, link_column) -> list[Row]:
+    """Авторы или жанры; популярность — число книг."""
+    count = (
+        select(link_column.label("id"), func.count().label("books"))
+        .group_by(link_column)
+        .subquery()
+    )
+    result = await session.execute(
+        select(model.id, model.name, model.slug, func.coalesce(count.c.books, 0))
+        .outerjoin(count, count.c.id == model.id)
+    )
+    return [(float(books), pack(entity_id, name, slug)) for entity_id, name, slug, books in result.all()]
+
+
+def _book_result(fields: list[str]) -> dict:
+    book_id, name, slug, authors, price, image_url = fields
+    return {
+        "type": "audiobook",
+        "id": int(book_id),
+        "slug": slug,
+        "name": name,
+        "authors": authors,
+        "price": float(price),
+        "image_url": image_url,
+        "url": f"/audiobook/{slug}",
+    }
+
+
+def _entity_result(kind: str, label: str, fields: list[str]) -> dict:
+    entity_id, name, slug = fields
+    return {
+        "type": kind,
+        "id": int(entity_id),
+        "slug": slug,
+        "name": name,
+        "label": label,
+        "url": f"/{kind}/{slug}",
+    }
+
+
+def _log_refresh_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Autocomplete index refresh failed: %s", task.exception())
+
+
+autocomplete = Autocomplete()
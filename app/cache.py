@@ -1,44 +1,784 @@
 import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
-from typing import Optional
+from app.database import async_session_maker
+from app.encoding import dumps, encode_default, loads
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Concatenate, Optional, ParamSpec, Sequence, TypeVar
+import asyncio
+import functools
+import gzip
+import hashlib
+import inspect
 import json
+import logging
+import struct
+import time
+import uuid
 
-redis_client: Optional[redis.Redis] = None
-redis_available: bool = True
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-async def get_redis() -> redis.Redis:
-    global redis_client, redis_available
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
-    if not redis_available:
-        raise ConnectionError("Redis is not available")
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
-    if redis_client is None:
-        redis_client = redis.from_url(
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+S = TypeVar("S")
+P = ParamSpec("P")
+
+# Идентификатор воркера: свои же сообщения об инвалидации пропускаем
+WORKER_ID = uuid.uuid4().hex
+
+# Номер поколения каталога. Все ключи кеша живут в пространстве текущего
+# поколения, поэтому после импорта достаточно одного INCR: старые ключи
+# просто перестают читаться и истекают сами по своим TTL.
+GENERATION_KEY = "catalog:generation"
+_GENERATION_MESSAGE = "!generation"
+_TAG_MESSAGE_PREFIX = "!tag:"
+
+
+class LocalCache:
+    """In-process LRU-кеш (L1) с TTL на запись и учётом занимаемой памяти.
+
+    Размер записи считается по длине сериализованного значения — это
+    приблизительная, но стабильная оценка, не требующая обхода объектов.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        # Просроченная запись остаётся до вытеснения: её можно отдать
+        # через peek_stale, пока другой воркер пересчитывает значение
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, size: int):
+        self._remove(key)
+
+        # Слишком большие значения в L1 не кладём, чтобы не вытеснить всё остальное
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, size, value)
+        self.size_bytes += size
+
+        while len(self._data) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._data.popitem(last=False)
+            self.size_bytes -= evicted_size
+            self.evictions += 1
+
+    def peek_stale(self, key: str) -> Any:
+        """Значение без учёта TTL и без обновления порядка LRU."""
+        entry = self._data.get(key)
+        return entry[2] if entry is not None else None
+
+    def delete(self, key: str):
+        self._remove(key)
+
+    def clear(self):
+        self._data.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "size_bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: str):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
+
+
+local_cache = LocalCache(
+    max_entries=settings.local_cache_max_entries,
+    max_bytes=settings.local_cache_max_bytes,
+)
+
+_listener_task: Optional[asyncio.Task] = None
+
+# Последнее прочитанное поколение и момент чтения (time.monotonic)
+_generation: int = 0
+_generation_checked_at: float = float("-inf")
+
+# Версии тегов @cached: тег -> (версия, момент чтения)
+_tag_versions: dict[str, tuple[int, float]] = {}
+
+# Загрузки, выполняющиеся прямо сейчас в этом воркере: ключ -> задача
+_inflight: dict[str, asyncio.Task] = {}
+
+singleflight_stats = {
+    "loads": 0,             # промахи, которые действительно пошли в БД
+    "coalesced_local": 0,   # дождались чужой загрузки в этом воркере
+    "coalesced_remote": 0,  # дождались загрузки другого воркера через Redis
+    "stale_served": 0,      # отдали устаревшее значение вместо ожидания загрузки
+    "lock_timeouts": 0,     # не дождались и загрузили сами
+}
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisUnavailable(ConnectionError):
+    """Redis недоступен или цепь разомкнута — вызов даже не выполнялся."""
+
+
+class CircuitBreaker:
+    """Автомат closed -> open -> half_open -> closed для вызовов Redis.
+
+    После failure_threshold ошибок подряд цепь размыкается, и вызовы сразу
+    отклоняются. Через задержку (экспоненциально растущую до max_delay)
+    пропускается один пробный вызов: успех замыкает цепь, ошибка снова
+    размыкает её на следующий шаг расписания.
+    """
+
+    def __init__(self, failure_threshold: int, base_delay: float, max_delay: float):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.open_count = 0
+        self.retry_at = 0.0
+        self.last_probe_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+
+        if self.state == "open" and time.monotonic() >= self.retry_at:
+            self.state = "half_open"
+            self.last_probe_at = time.time()
+            return True
+
+        # open до истечения задержки или half_open с уже идущей пробой
+        return False
+
+    def release_probe(self):
+        """Проба отменена без ответа Redis: следующий вызов пробует снова."""
+        if self.state == "half_open":
+            self.state = "open"
+            self.retry_at = time.monotonic()
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.open_count = 0
+
+    def record_failure(self, error: BaseException):
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        self.last_error = repr(error)
+
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            delay = min(self.base_delay * 2 ** self.open_count, self.max_delay)
+            self.open_count += 1
+            self.state = "open"
+            self.retry_at = time.monotonic() + delay
+            logger.warning("Redis circuit opened for %.1fs: %s", delay, self.last_error)
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "retry_in": max(self.retry_at - time.monotonic(), 0.0) if self.state == "open" else 0.0,
+            "last_probe_at": self.last_probe_at,
+            "last_error": self.last_error,
+        }
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.redis_breaker_failure_threshold,
+    base_delay=settings.redis_breaker_base_delay,
+    max_delay=settings.redis_breaker_max_delay,
+)
+
+# Один пул соединений на процесс: его используют и кеш, и остальной код
+_redis_client: Optional[redis.Redis] = None
+
+
+def _client() -> redis.Redis:
+    global _redis_client
+    if _redis_client is None:
+        pool = redis.ConnectionPool.from_url(
             settings.redis_url,
-            encoding="utf-8",
-            decode_responses=True,
-            socket_connect_timeout=1,
-            socket_timeout=1
+            # Значения кеша бинарные (заголовок + возможное сжатие)
+            decode_responses=False,
+            max_connections=settings.redis_max_connections,
+            socket_connect_timeout=settings.redis_socket_timeout,
+            socket_timeout=settings.redis_socket_timeout,
         )
+        _redis_client = redis.Redis(connection_pool=pool)
+    return _redis_client
+
+
+async def redis_call(fn: Callable[[redis.Redis], Awaitable[T]]) -> T:
+    """Выполняет fn(client) через circuit breaker с таймаутом на вызов."""
+    if not breaker.allow():
+        raise RedisUnavailable("Redis circuit is open")
+
+    try:
+        result = await asyncio.wait_for(fn(_client()), timeout=settings.redis_call_timeout)
+    except Exception as e:
+        breaker.record_failure(e)
+        raise
+    except BaseException:
+        # Отмена (клиент ушёл, остановка воркера) ничего не говорит о Redis,
+        # но пробу надо вернуть — иначе цепь навсегда останется half_open
+        breaker.release_probe()
+        raise
+
+    breaker.record_success()
+    return result
+
+
+def redis_state() -> dict:
+    pool = _client().connection_pool
+    return {
+        **breaker.snapshot(),
+        "pool_in_use": len(pool._in_use_connections),
+        "pool_available": len(pool._available_connections),
+    }
+
+
+class CacheEntry:
+    """Декодированное значение из кеша вместе с мягким сроком годности.
+
+    size — длина сериализованного (несжатого) значения, по ней L1 ведёт
+    учёт памяти.
+    """
+
+    __slots__ = ("value", "soft_deadline", "size")
+
+    def __init__(self, value: Any, soft_deadline: float, size: int = 0):
+        self.value = value
+        self.soft_deadline = soft_deadline
+        self.size = size
+
+    @property
+    def is_stale(self) -> bool:
+        return self.soft_deadline <= time.time()
+
+
+# Сериализаторы и компрессоры: id хранится в заголовке значения, поэтому
+# смена настроек не ломает уже записанные ключи. Недоступные библиотеки
+# просто не регистрируются.
+SERIALIZERS: dict[str, tuple[int, Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "str": (0, lambda v: v.encode("utf-8"), lambda b: b.decode("utf-8")),
+    "json": (1, lambda v: json.dumps(v, ensure_ascii=False, default=encode_default).encode("utf-8"), json.loads),
+    # Готовые байты (JSON-документы из Postgres) хранятся как есть
+    "bytes": (4, bytes, bytes),
+}
+COMPRESSORS: dict[str, tuple[int, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "none": (0, lambda b: b, lambda b: b),
+    "gzip": (1, lambda b: gzip.compress(b, compresslevel=5), gzip.decompress),
+}
+
+if orjson is not None:
+    # Тот же кодировщик, что у ответов API: Decimal, datetime, dataclass
+    SERIALIZERS["orjson"] = (2, dumps, loads)
+
+if msgpack is not None:
+    SERIALIZERS["msgpack"] = (
+        3,
+        lambda v: msgpack.packb(v, use_bin_type=True, default=encode_default),
+        lambda b: msgpack.unpackb(b, raw=False),
+    )
+
+if zstandard is not None:
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    COMPRESSORS["zstd"] = (2, _zstd_compressor.compress, _zstd_decompressor.decompress)
+
+_SERIALIZERS_BY_ID = {sid: loads for sid, _, loads in SERIALIZERS.values()}
+_COMPRESSORS_BY_ID = {cid: decompress for cid, _, decompress in COMPRESSORS.values()}
+
+# Заголовок: маркер 0x00, id сериализатора, id компрессора, soft deadline.
+# Текстовые значения не начинаются с 0x00, так что формат однозначен.
+_HEADER = struct.Struct(">cBBd")
+_MAGIC = b"\x00"
+
+# Текстовый конверт предыдущей версии: "~1|<j или s>|<soft deadline>|<payload>"
+_LEGACY_PREFIX = b"~1|"
+
+
+def _pick(registry: dict, name: str, fallback: str):
+    return registry.get(name) or registry[fallback]
+
+
+def encode_value(
+    value: Any,
+    soft_deadline: float,
+    serializer: Optional[str] = None,
+    compression: Optional[str] = None,
+) -> tuple[bytes, int]:
+    """Кодирует значение для Redis; возвращает байты и несжатый размер."""
+    if isinstance(value, str):
+        sid, dumps, _ = SERIALIZERS["str"]
+    elif isinstance(value, bytes):
+        sid, dumps, _ = SERIALIZERS["bytes"]
+    else:
+        sid, dumps, _ = _pick(SERIALIZERS, serializer or settings.cache_serializer, "json")
+    payload = dumps(value)
+    size = len(payload)
+
+    cid = 0
+    if size >= settings.cache_compress_threshold:
+        cid, compress, _ = _pick(COMPRESSORS, compression or settings.cache_compression, "gzip")
+        payload = compress(payload)
+
+    return _HEADER.pack(_MAGIC, sid, cid, soft_deadline) + payload, size
+
+
+def decode_value(raw: bytes) -> Optional[CacheEntry]:
+    if raw.startswith(_MAGIC):
+        _, sid, cid, soft_deadline = _HEADER.unpack_from(raw)
+        loads = _SERIALIZERS_BY_ID.get(sid)
+        decompress = _COMPRESSORS_BY_ID.get(cid)
+        # Формат, для которого в этом процессе нет библиотеки, — просто промах
+        if loads is None or decompress is None:
+            return None
+        payload = decompress(raw[_HEADER.size:])
+        return CacheEntry(loads(payload), soft_deadline, len(payload))
+
+    if raw.startswith(_LEGACY_PREFIX):
+        _, fmt, soft_deadline, payload = raw.decode("utf-8").split("|", 3)
+        value = json.loads(payload) if fmt == "j" else payload
+        return CacheEntry(value, float(soft_deadline), len(raw))
+
+    # Записи без конверта считаем промахом — их перезапишет следующая загрузка
+    return None
+
+
+async def get_catalog_generation() -> int:
+    """Текущее поколение каталога; перечитывается из Redis не чаще раза в
+    catalog_generation_check_interval секунд (или сразу по pub/sub)."""
+    global _generation, _generation_checked_at
+
+    now = time.monotonic()
+    if now - _generation_checked_at < settings.catalog_generation_check_interval:
+        return _generation
+
+    _generation_checked_at = now
+    try:
+        value = await redis_call(lambda r: r.get(GENERATION_KEY))
+    except Exception:
+        return _generation
+
+    generation = int(value) if value else 0
+    if generation != _generation:
+        # Записи прошлого поколения больше не читаются — освобождаем память
+        local_cache.clear()
+        _generation = generation
+    return _generation
+
+
+async def bump_catalog_generation() -> Optional[int]:
+    """Переключает кеш на новое поколение. Вызывается скриптами импорта после commit."""
+    try:
+        generation = await redis_call(lambda r: r.incr(GENERATION_KEY))
+        await publish_invalidation(_GENERATION_MESSAGE)
+    except Exception as e:
+        logger.warning("Failed to bump catalog generation: %s", e)
+        return None
+    return generation
+
+
+async def catalog_key(key: str) -> str:
+    return f"g{await get_catalog_generation()}:{key}"
+
+
+async def _read(key: str) -> Optional[CacheEntry]:
+    """Запись из L1, а при промахе — из Redis с подогревом L1.
+
+    В L1 лежит уже декодированный CacheEntry, поэтому горячие ключи не
+    проходят через json.loads на каждом запросе.
+    """
+    entry = local_cache.get(key)
+    if entry is not None:
+        return entry
+
+    raw, ttl = await _remote_get(key)
+    if raw is None:
+        return None
+
+    entry = decode_value(raw)
+    if entry is not None:
+        local_cache.set(key, entry, min(ttl, settings.local_cache_ttl), entry.size)
+    return entry
+
+
+async def cache_get(key: str) -> Any:
+    """Значение по ключу, пока не истёк жёсткий TTL (устаревшее тоже)."""
+    entry = await _read(await catalog_key(key))
+    return entry.value if entry is not None else None
+
+
+async def cache_set(key: str, value: Any, ttl: int = 300, stale_ttl: int = 0):
+    """Сохраняет строку или JSON-совместимый объект.
+
+    ttl — мягкий срок: после него значение считается устаревшим.
+    stale_ttl — сколько ещё после этого значение хранится и может
+    отдаваться, пока get_or_load обновляет его в фоне.
+    """
+    await _write(await catalog_key(key), value, ttl, stale_ttl)
+
+
+async def _write(key: str, value: Any, ttl: int, stale_ttl: int) -> Any:
+    """Сохраняет значение и возвращает его в том виде, в каком его отдаёт кеш.
+
+    В L1 кладётся декодированная копия, а не сам value: промах, L1 и Redis
+    возвращают одно и то же (JSON-форму — словари и списки вместо
+    dataclass и кортежей), и изменение результата вызывающим кодом не
+    портит запись в кеше.
+    """
+    soft_deadline = time.time() + ttl
+    hard_ttl = ttl + stale_ttl
+    raw, _ = encode_value(value, soft_deadline)
+    entry = decode_value(raw)
+
+    local_cache.set(key, entry, min(hard_ttl, settings.local_cache_ttl), entry.size)
+    try:
+        await redis_call(lambda r: r.setex(key, hard_ttl, raw))
+        await publish_invalidation(key)
+    except Exception:
+        pass
+    return entry.value
+
+
+async def cache_delete(key: str):
+    key = await catalog_key(key)
+    local_cache.delete(key)
+    try:
+        await redis_call(lambda r: r.delete(key))
+        await publish_invalidation(key)
+    except Exception:
+        pass
+
+
+Loader = Callable[[AsyncSession], Awaitable[Any]]
+
+
+async def get_or_load(key: str, loader: Loader, ttl: int = 300, stale_ttl: int = 0) -> Any:
+    """Значение из кеша, а при промахе — результат loader(session), сохранённый в кеш.
+
+    Одновременные промахи по одному ключу схлопываются: в воркере загрузку
+    выполняет одна корутина, между воркерами — держатель Redis-блокировки.
+    Устаревшее (между ttl и ttl + stale_ttl) значение отдаётся сразу,
+    а обновление запускается в фоне.
+
+    loader получает собственную сессию: фоновое обновление переживает
+    запрос, который его запустил.
+    """
+    key = await catalog_key(key)
+    entry = await _read(key)
+    if entry is not None:
+        if entry.is_stale:
+            _refresh_in_background(key, loader, ttl, stale_ttl)
+        return entry.value
+
+    task = _inflight.get(key)
+    if task is not None:
+        singleflight_stats["coalesced_local"] += 1
+    else:
+        task = _start_load(key, loader, ttl, stale_ttl, wait=True)
+
+    # shield: отмена одного запроса не должна отменять загрузку для остальных
+    return await asyncio.shield(task)
+
+
+def _start_load(key: str, loader: Loader, ttl: int, stale_ttl: int, wait: bool) -> asyncio.Task:
+    task = asyncio.create_task(_load_across_workers(key, loader, ttl, stale_ttl, wait))
+    _inflight[key] = task
+    task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return task
+
+
+def _refresh_in_background(key: str, loader: Loader, ttl: int, stale_ttl: int):
+    if key in _inflight:
+        return
+
+    singleflight_stats["stale_served"] += 1
+    task = _start_load(key, loader, ttl, stale_ttl, wait=False)
+    task.add_done_callback(_log_refresh_error)
+
+
+def _log_refresh_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background cache refresh failed: %s", task.exception())
+
+
+async def _load_across_workers(key: str, loader: Loader, ttl: int, stale_ttl: int, wait: bool) -> Any:
+    token = await _acquire_lock(key)
+
+    if token is None:
+        # Фоновому обновлению ждать незачем: значение уже обновляет другой воркер
+        if not wait:
+            return None
+
+        value = await _wait_for_remote(key)
+        if value is not None:
+            singleflight_stats["coalesced_remote"] += 1
+            return value
+
+        stale = local_cache.peek_stale(key)
+        if stale is not None:
+            singleflight_stats["stale_served"] += 1
+            return stale.value
+
+        singleflight_stats["lock_timeouts"] += 1
+
+    try:
+        singleflight_stats["loads"] += 1
+        async with async_session_maker() as session:
+            value = await loader(session)
+        return await _write(key, value, ttl, stale_ttl)
+    finally:
+        if token:
+            await _release_lock(key, token)
+
+
+async def _acquire_lock(key: str) -> Optional[str]:
+    """Токен блокировки или None, если загрузку уже выполняет другой воркер.
+
+    Без Redis координировать нечего — считаем, что блокировка наша.
+    """
+    token = uuid.uuid4().hex
+    try:
+        acquired = await redis_call(lambda r: r.set(f"lock:{key}", token, nx=True, ex=settings.cache_lock_ttl))
+    except Exception:
+        return token
+    return token if acquired else None
+
+
+async def _release_lock(key: str, token: str):
+    try:
+        await redis_call(lambda r: r.eval(_RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token))
+    except Exception:
+        pass
+
+
+async def _wait_for_remote(key: str) -> Any:
+    deadline = time.monotonic() + settings.cache_lock_wait
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.cache_lock_poll_interval)
+        entry = await _read(key)
+        if entry is not None and not entry.is_stale:
+            return entry.value
+    return None
+
+
+async def tag_prefix(tags: Sequence[str]) -> str:
+    """Версии тегов для ключа: после invalidate_tag ключи с тегом меняются."""
+    now = time.monotonic()
+    outdated = [
+        tag for tag in tags
+        if tag not in _tag_versions
+        or now - _tag_versions[tag][1] >= settings.catalog_generation_check_interval
+    ]
+    if outdated:
         try:
-            await redis_client.ping()
+            values = await redis_call(lambda r: r.mget([f"tag:{tag}" for tag in outdated]))
         except Exception:
-            redis_available = False
-            redis_client = None
-            raise
+            values = None
+        if values is not None:
+            for tag, value in zip(outdated, values):
+                _tag_versions[tag] = (int(value) if value else 0, now)
+
+    return ",".join(f"{tag}.{_tag_versions.get(tag, (0, 0))[0]}" for tag in tags)
 
-    return redis_client
 
-async def cache_get(key: str) -> Optional[str]:
+async def invalidate_tag(tag: str) -> Optional[int]:
+    """Сбрасывает все ключи @cached-методов с этим тегом (одним INCR)."""
+    _tag_versions.pop(tag, None)
     try:
-        r = await get_redis()
-        return await r.get(key)
-    except Exception:
+        version = await redis_call(lambda r: r.incr(f"tag:{tag}"))
+        await publish_invalidation(f"{_TAG_MESSAGE_PREFIX}{tag}")
+    except Exception as e:
+        logger.warning("Failed to invalidate cache tag %s: %s", tag, e)
         return None
+    return version
+
+
+def _call_key(name: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    bound = signature.bind(None, *args, **kwargs)
+    bound.apply_defaults()
+    # Первый параметр — self, в ключ он не входит
+    arguments = list(bound.arguments.items())[1:]
+    key = f"{name}:" + ",".join(f"{k}={v!r}" for k, v in arguments)
+    if len(key) > 200:
+        key = f"{name}:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+    return key
+
+
+def cached(
+    ttl: int,
+    stale_ttl: int = 0,
+    tags: Sequence[str] = (),
+) -> Callable[[Callable[Concatenate[S, P], Awaitable[T]]], Callable[Concatenate[S, P], Awaitable[T]]]:
+    """Кеширует результат async-метода сервиса через get_or_load.
+
+    Ключ строится из имени метода и значений аргументов (с учётом значений
+    по умолчанию), поколения каталога и версий тегов. Результат должен
+    сериализоваться в JSON (словари, списки, строки, числа, dataclass) или
+    быть bytes — такие значения хранятся как есть. Возвращается всегда
+    JSON-форма: dataclass приходят словарями, кортежи — списками, и
+    сервис собирает объекты заново сам (как get_detail — BookDetail).
+
+    При промахе метод выполняется на новом экземпляре сервиса с
+    собственной сессией — type(self)(session), поэтому сервис должен
+    создаваться из одной сессии, а попадание в кеш не трогает self.db.
+    """
+    def decorator(method: Callable[Concatenate[S, P], Awaitable[T]]) -> Callable[Concatenate[S, P], Awaitable[T]]:
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self: S, *args: P.args, **kwargs: P.kwargs) -> T:
+            key = _call_key(method.__qualname__, signature, args, kwargs)
+            if tags:
+                key = f"{await tag_prefix(tags)}|{key}"
+
+            service_class = type(self)
+
+            async def loader(session: AsyncSession) -> T:
+                return await method(service_class(session), *args, **kwargs)
+
+            return await get_or_load(key, loader, ttl=ttl, stale_ttl=stale_ttl)
+
+        return wrapper
 
-async def cache_set(key: str, value: str, ttl: int = 300):
+    return decorator
+
+
+def cache_stats() -> dict:
+    return {
+        "generation": _generation,
+        "local": local_cache.stats(),
+        "singleflight": dict(singleflight_stats),
+    }
+
+
+async def _remote_get(key: str) -> tuple[Optional[bytes], int]:
+    """Значение из Redis вместе с оставшимся TTL — чтобы L1 не пережил L2."""
     try:
-        r = await get_redis()
-        await r.setex(key, ttl, value)
+        value, ttl = await redis_call(lambda r: _get_with_ttl(r, key))
     except Exception:
-        pass
\ No newline at end of file
+        return None, 0
+
+    # -1: ключ без срока жизни
+    if ttl == -1:
+        ttl = settings.local_cache_ttl
+    return value, max(ttl, 0)
+
+
+async def _get_with_ttl(r: redis.Redis, key: str) -> list:
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.ttl(key)
+        return await pipe.execute()
+
+
+async def publish_invalidation(key: str):
+    """Сообщает остальным воркерам, что L1-запись по ключу устарела."""
+    await redis_call(lambda r: r.publish(settings.cache_invalidation_channel, f"{WORKER_ID}:{key}"))
+
+
+async def _invalidation_listener():
+    while True:
+        pubsub = None
+        try:
+            # Подписка держит отдельное соединение; пока цепь разомкнута, не пытаемся
+            if breaker.state != "closed":
+                await asyncio.sleep(1)
+                continue
+
+            pubsub = _client().pubsub()
+            await pubsub.subscribe(settings.cache_invalidation_channel)
+
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+
+                origin, _, key = message["data"].decode("utf-8").partition(":")
+                if key == _GENERATION_MESSAGE:
+                    _expire_generation()
+                elif key.startswith(_TAG_MESSAGE_PREFIX):
+                    _tag_versions.pop(key[len(_TAG_MESSAGE_PREFIX):], None)
+                elif origin != WORKER_ID:
+                    local_cache.delete(key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Пока подписка не работает, L1 ограничен коротким local_cache_ttl
+            logger.warning("Cache invalidation listener error: %s", e)
+            await asyncio.sleep(5)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+def _expire_generation():
+    global _generation_checked_at
+    _generation_checked_at = float("-inf")
+
+
+def start_invalidation_listener():
+    global _listener_task
+    if _listener_task is None:
+        _listener_task = asyncio.create_task(_invalidation_listener())
+
+
+async def stop_invalidation_listener():
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
@@ -21,5 +21,65 @@ class Settings(BaseSettings):
 
     debug: bool = False
     redis_url: str = "redis://localhost:6379/0"
+    redis_max_connections: int = 50
+    redis_socket_timeout: float = 1.0
+    redis_call_timeout: float = 0.5
+
+    # Circuit breaker для Redis: после N ошибок подряд вызовы не выполняются,
+    # пробный вызов — через base_delay, 2*base_delay, ... но не реже max_delay
+    redis_breaker_failure_threshold: int = 3
+    redis_breaker_base_delay: float = 1.0
+    redis_breaker_max_delay: float = 60.0
+
+    # In-process L1-кеш перед Redis
+    local_cache_max_entries: int = 2048
+    local_cache_max_bytes: int = 64 * 1024 * 1024
+    local_cache_ttl: int = 30
+    cache_invalidation_channel: str = "cache:invalidate"
+    catalog_generation_check_interval: float = 5.0
+
+    # Формат значений в Redis: orjson | msgpack | json; сжатие zstd | gzip | none
+    cache_serializer: str = "orjson"
+    cache_compression: str = "zstd"
+    cache_compress_threshold: int = 4096
+
+    # Защита от одновременных промахов (single-flight)
+    cache_lock_ttl: int = 10
+    cache_lock_wait: float = 3.0
+    cache_lock_poll_interval: float = 0.05
+
+    # Поиск: ilike — подстрока в названии; fulltext — tsvector по названию,
+    # авторам и описанию с ранжированием (нужна миграция b7d2e4f1a9c3);
+    # fuzzy — сходство по триграммам с названием и авторами (pg_trgm)
+    search_engine: str = "ilike"
+    # Порог word_similarity для нечёткого поиска: 0..1, меньше — терпимее к опечаткам
+    search_fuzzy_threshold: float = 0.5
+    # Повторять пустой поиск в нечётком режиме
+    search_fuzzy_fallback: bool = True
+
+    # Подсчёт total: точные счётчики сущностей живут в кеше до импорта,
+    # выборки от count_estimate_threshold строк считаются по оценке планировщика
+    count_cache_ttl: int = 3600
+    count_estimate_threshold: int = 10000
+
+    # JSON API отдают документы, собранные Postgres (app/services/raw_json.py)
+    json_api_raw: bool = True
+
+    # Индекс подсказок /api/search в памяти каждого воркера
+    autocomplete_index_enabled: bool = True
+
+    # Кеш готовых HTML-страниц каталога (ETag/304)
+    page_cache_enabled: bool = True
+    page_cache_ttl: int = 300
+    page_cache_max_age: int = 60
+
+    # Прогрев кеша при старте и после импорта
+    cache_warmup_on_startup: bool = True
+    cache_warmup_genres: int = 20
+    cache_warmup_authors: int = 20
+    cache_warmup_pages: int = 3
+    cache_warmup_concurrency: int = 4
+    # Сколько популярных поисковых запросов прогревать
+    cache_warmup_queries: int = 50
 
 settings = Settings()
\ No newline at end of file
@@ -1,7 +1,9 @@
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.config import settings
-from redis.asyncio import Redis
 
 
 engine = create_async_engine(
@@ -19,23 +21,34 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
-redis_client = None
-
 
 class Base(DeclarativeBase):
     pass
 
 
-async def get_db() -> AsyncSession:
-    async with async_session_maker() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+class DbUsage:
+    """Сколько раз запрос брал соединение из пула."""
+    __slots__ = ("checkouts",)
+
+    def __init__(self):
+        self.checkouts = 0
+
 
+# Учёт текущего запроса. В contextvar лежит изменяемый объект, а не
+# число: checkout вызывается в greenlet'е драйвера и в задачах загрузки
+# кеша, а им достаточно увидеть тот же объект
+db_usage: ContextVar[Optional[DbUsage]] = ContextVar("db_usage", default=None)
 
-async def get_redis() -> Redis:
-    global redis_client
-    if redis_client is None:
-        redis_client = Redis.from_url(settings.redis_url, decode_responses=True)
-    return redis_client
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    usage = db_usage.get()
+    if usage is not None:
+        usage.checkouts += 1
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    # Соединение AsyncSession берёт из пула только на первом запросе к БД:
+    # ответ целиком из кеша пул не трогает
+    async with async_session_maker() as session:
+        yield session
@@ -0,0 +1,42 @@
+"""Учёт обращений к пулу соединений на каждый запрос.
+
+Счётчики в /health показывают, сколько запросов воркера брали соединение
+из пула и сколько обошлись без него (ответ целиком из кеша). В режиме
+debug заголовок X-DB-Checkouts показывает число обращений к пулу
+у каждого ответа.
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.database import DbUsage, db_usage
+
+db_usage_stats = {"requests": 0, "pool_free": 0, "checkouts": 0}
+
+
+class DbUsageMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        usage = DbUsage()
+        token = db_usage.set(usage)
+
+        async def send_with_usage(message: Message):
+            if message["type"] == "http.response.start" and settings.debug:
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Checkouts", str(usage.checkouts))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_usage)
+        finally:
+            db_usage.reset(token)
+            db_usage_stats["requests"] += 1
+            db_usage_stats["checkouts"] += usage.checkouts
+            if usage.checkouts == 0:
+                db_usage_stats["pool_free"] += 1
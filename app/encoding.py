@@ -0,0 +1,48 @@
+"""Общий JSON-кодировщик: ответы API, значения кеша и фильтр tojson.
+
+orjson, если установлен, иначе stdlib json с тем же результатом.
+Decimal (цены) кодируется числом, datetime (updated_at) — строкой ISO 8601,
+dataclass (карточки книг) — объектом.
+"""
+import dataclasses
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_default(value: Any) -> Any:
+    """Типы, которых нет в JSON; orjson сам кодирует datetime и dataclass."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+else:
+    def dumps(value: Any) -> bytes:
+        return json.dumps(
+            value, ensure_ascii=False, separators=(",", ":"), default=encode_default
+        ).encode("utf-8")
+
+    loads = json.loads
+
+
+def dumps_str(value: Any, **_) -> str:
+    """dumps для политики json.dumps_function в Jinja2 (фильтр tojson)."""
+    return dumps(value).decode("utf-8")
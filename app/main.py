@@ -1,15 +1,30 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
+from app.autocomplete import autocomplete
 from app.config import settings
 from app.routes import router
+from app.cache import start_invalidation_listener, stop_invalidation_listener, cache_stats, redis_state
+from app.db_usage import DbUsageMiddleware, db_usage_stats
+from app.page_cache import PageCacheMiddleware
+from app.responses import JSONResponse
+from app.warmup import warm_cache
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print(f"Starting {settings.site_name}...")
+    start_invalidation_listener()
+    autocomplete.start()
+    # Прогрев в фоне: приложение начинает отвечать сразу
+    warmup = asyncio.create_task(warm_cache()) if settings.cache_warmup_on_startup else None
     yield
     print("Stopping application...")
+    if warmup and not warmup.done():
+        warmup.cancel()
+    await autocomplete.stop()
+    await stop_invalidation_listener()
 
 
 app = FastAPI(
@@ -17,8 +32,15 @@ app = FastAPI(
     description=settings.site_description,
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=JSONResponse,
 )
 
+if settings.page_cache_enabled:
+    app.add_middleware(PageCacheMiddleware)
+
+# Снаружи кеша страниц: учитывает и ответы, отданные из него
+app.add_middleware(DbUsageMiddleware)
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 app.include_router(router)
@@ -26,4 +48,11 @@ app.include_router(router)
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "app": settings.site_name}
+    return JSONResponse({
+        "status": "ok",
+        "app": settings.site_name,
+        "redis": redis_state(),
+        "cache": cache_stats(),
+        "db": db_usage_stats,
+        "autocomplete": autocomplete.stats(),
+    })
@@ -7,6 +7,7 @@ from app.models.audiobook import (
     audiobook_author,
     audiobook_genre,
     audiobook_textbook,
+    genre_closure,
 )
 
 __all__ = [
@@ -18,4 +19,5 @@ __all__ = [
     "audiobook_author",
     "audiobook_genre",
     "audiobook_textbook",
+    "genre_closure",
 ]
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 from sqlalchemy import String, Text, Integer, DECIMAL, DateTime, ForeignKey, Table, Column, Index, JSON, Boolean
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -19,6 +20,18 @@ audiobook_genre = Table(
     Column("genre_id", Integer, ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True),
 )
 
+# Замыкание иерархии жанров: пара (предок, потомок) для всех уровней,
+# включая сам жанр с depth = 0. Поддерево и путь до корня — один индексный
+# поиск без рекурсии.
+genre_closure = Table(
+    "genre_closure",
+    Base.metadata,
+    Column("ancestor_id", Integer, ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True),
+    Column("descendant_id", Integer, ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True),
+    Column("depth", Integer, nullable=False),
+    Index("ix_genre_closure_descendant", "descendant_id", "depth"),
+)
+
 audiobook_textbook = Table(
     "audiobook_textbook",
     Base.metadata,
@@ -34,6 +47,8 @@ class Author(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     slug: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
+    # Число книг автора; пересчитывается импортом
+    book_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     audiobooks: Mapped[List["Audiobook"]] = relationship(
         "Audiobook",
@@ -41,6 +56,10 @@ class Author(Base):
         back_populates="authors"
     )
 
+    __table_args__ = (
+        Index("ix_authors_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
 
 class Genre(Base):
     __tablename__ = "genres"
@@ -49,6 +68,8 @@ class Genre(Base):
     name: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     slug: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     parent_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("genres.id", ondelete="SET NULL"), nullable=True)
+    # Число разных книг жанра вместе с поджанрами; пересчитывается импортом
+    book_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     parent: Mapped["Genre"] = relationship("Genre", remote_side=[id], back_populates="children")
     children: Mapped[List["Genre"]] = relationship("Genre", back_populates="parent")
@@ -81,6 +102,10 @@ class Audiobook(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    # Полнотекстовый индекс: название, авторы, описание. Заполняется
+    # триггерами в БД, в выборки карточек не попадает
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, nullable=True, deferred=True)
+
     authors: Mapped[List["Author"]] = relationship(
         "Author",
         secondary=audiobook_author,
@@ -102,8 +127,11 @@ class Audiobook(Base):
 
     __table_args__ = (
         Index("idx_audiobook_name_search", "name"),
+        Index("ix_audiobooks_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_audiobooks_slug_trgm", "slug", postgresql_using="gin", postgresql_ops={"slug": "gin_trgm_ops"}),
         Index("idx_audiobook_price", "price"),
-        Index("idx_audiobook_created", "created_at"),
+        Index("ix_audiobooks_created_id", "created_at", "id"),
+        Index("ix_audiobooks_search_vector", "search_vector", postgresql_using="gin"),
     )
 
 
@@ -115,7 +143,8 @@ class TextBook(Base):
     litres_id: Mapped[int] = mapped_column(Integer, unique=True, index=True, nullable=False)
 
     name: Mapped[str] = mapped_column(String(500), nullable=False)
-    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # До 50k символов; загружается только при обращении к атрибуту
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)
 
     price: Mapped[Optional[float]] = mapped_column(DECIMAL(10, 2), nullable=True)
     url: Mapped[str] = mapped_column(String(1000), nullable=False)
@@ -0,0 +1,182 @@
+"""Кеш готовых HTML-страниц каталога с ETag и ответами 304.
+
+ASGI-middleware перед роутами: отрендеренный ответ хранится целиком по
+пути и параметрам страницы в пространстве текущего поколения каталога и
+версий тегов. Повторный запрос отдаётся без БД и Jinja2, а запрос с
+совпадающим If-None-Match получает 304 без тела.
+
+В ключ входят только известные параметры роута в фиксированном порядке;
+запрос с любым другим параметром (utm_*, повтор параметра) идёт мимо кеша,
+чтобы произвольные query string не плодили копии страниц. Host, схема и
+сырой query string запроса в ключ не входят, поэтому шаблоны строят
+адреса страниц от settings.site_url (canonical_url в app/templates.py).
+"""
+import hashlib
+import logging
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache import cache_get, cache_set, tag_prefix
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Кешируемые страницы: теги, от которых зависит содержимое, и параметры роута
+PAGE_TAGS: list[tuple[re.Pattern, tuple[str, ...], tuple[str, ...]]] = [
+    (re.compile(r"^/$"), ("catalog", "top_books"), ()),
+    (re.compile(r"^/audiobook/[^/]+$"), ("catalog",), ()),
+    (re.compile(r"^/genres$"), ("catalog", "genres"), ()),
+    (re.compile(r"^/genre/[^/]+$"), ("catalog", "genres"), ("page", "price", "format", "genre", "fragment", "sort")),
+    (re.compile(r"^/authors$"), ("catalog", "authors"), ("page", "letter")),
+    (re.compile(r"^/author/[^/]+$"), ("catalog", "authors"), ("page",)),
+]
+
+# Длиннее значения параметров роутов не бывают
+_MAX_PARAM_LENGTH = 255
+
+
+def _page_tags(path: str) -> Optional[tuple[tuple[str, ...], tuple[str, ...]]]:
+    for pattern, tags, params in PAGE_TAGS:
+        if pattern.match(path):
+            return tags, params
+    return None
+
+
+def canonical_page_query(path: str, query_string: bytes) -> Optional[str]:
+    """Query string кешируемой страницы, как в её ключе; None — страница не кешируется."""
+    page_tags = _page_tags(path)
+    if page_tags is None:
+        return None
+    return canonical_query(query_string, page_tags[1])
+
+
+def canonical_query(query_string: bytes, allowed: tuple[str, ...]) -> Optional[str]:
+    """Параметры страницы в порядке allowed без пустых; None — не кешировать."""
+    values = {}
+    for name, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+        if name not in allowed or name in values or len(value) > _MAX_PARAM_LENGTH:
+            return None
+        values[name] = value
+    return urlencode([(name, values[name]) for name in allowed if values.get(name)])
+
+
+def make_etag(body: bytes) -> str:
+    """Сильный ETag — хеш тела: одинаковые байты дают одинаковый тег."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+# Заголовки, которые _send_page выставляет сам
+_REBUILT_HEADERS = {b"content-length", b"etag", b"cache-control"}
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class PageCacheMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        page_tags = _page_tags(scope["path"])
+        headers = Headers(scope=scope)
+        # Только анонимные запросы: у авторизованных страница может отличаться
+        if page_tags is None or "authorization" in headers:
+            await self.app(scope, receive, send)
+            return
+
+        tags, params = page_tags
+        query = canonical_query(scope["query_string"], params)
+        if query is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"page:{await tag_prefix(tags)}|{scope['path']}?{query}"
+        if_none_match = headers.get("if-none-match")
+
+        page = await cache_get(key)
+        if page is not None:
+            await self._send_page(send, page, if_none_match)
+            return
+
+        start: Optional[Message] = None
+        chunks: list[bytes] = []
+
+        async def capture(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await finish()
+
+        async def finish():
+            body = b"".join(chunks)
+            response_headers = MutableHeaders(raw=start["headers"])
+            content_type = response_headers.get("content-type", "")
+
+            # 404, прочие ответы и ответы с cookie не кешируем — отдаём как есть
+            if (
+                start["status"] != 200
+                or not content_type.startswith("text/html")
+                or "set-cookie" in response_headers
+            ):
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            page = {
+                "etag": make_etag(body),
+                "headers": [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in start["headers"]
+                    if name.lower() not in _REBUILT_HEADERS
+                ],
+                "body": body.decode("utf-8"),
+            }
+            try:
+                await cache_set(key, page, ttl=settings.page_cache_ttl)
+            except Exception as e:
+                logger.warning("Failed to cache page %s: %s", key, e)
+
+            await self._send_page(send, page, if_none_match, body)
+
+        await self.app(scope, receive, capture)
+
+    async def _send_page(
+        self,
+        send: Send,
+        page: dict,
+        if_none_match: Optional[str],
+        body: Optional[bytes] = None,
+    ):
+        headers = [
+            (b"etag", page["etag"].encode("latin-1")),
+            (b"cache-control", f"public, max-age={settings.page_cache_max_age}".encode("latin-1")),
+        ]
+
+        if if_none_match and etag_matches(if_none_match, page["etag"]):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if body is None:
+            body = page["body"].encode("utf-8")
+        # Остальные заголовки роута — как в исходном ответе
+        headers += [(name.encode("latin-1"), value.encode("latin-1")) for name, value in page["headers"]]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
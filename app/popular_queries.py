@@ -0,0 +1,71 @@
+"""Счётчик популярных поисковых запросов.
+
+Каждый поиск с результатами увеличивает счётчик нормализованного запроса
+в sorted set Redis за текущие сутки. Самые частые запросы за последние
+дни прогреваются вместе с остальным кешем после импорта, поэтому первая
+страница и фасеты «гарри поттер» не считаются заново на живом запросе.
+"""
+import logging
+import random
+import time
+
+from app.cache import redis_call
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "search:popular"
+# Дни, за которые считается популярность; ключи дня живут чуть дольше
+DAYS = 7
+# Сколько разных запросов хранить за день: хвост из единичных отбрасывается
+MAX_QUERIES_PER_DAY = 10000
+
+
+def _day_key(days_ago: int = 0) -> str:
+    day = time.gmtime(time.time() - days_ago * 86400)
+    return f"{KEY_PREFIX}:{time.strftime('%Y%m%d', day)}"
+
+
+async def record_query(query: str):
+    """Учитывает запрос; ошибки Redis на поиск не влияют."""
+    if not query:
+        return
+    key = _day_key()
+
+    async def record(r):
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.zincrby(key, 1, query)
+            pipe.expire(key, (DAYS + 1) * 86400)
+            # Урезаем изредка: ZREMRANGEBYRANK по большому set не бесплатен.
+            # Случайно, а не по hash(query): хеш строк солится в каждом
+            # процессе, и часть запросов не урезала бы set никогда
+            if random.random() < 0.01:
+                pipe.zremrangebyrank(key, 0, -MAX_QUERIES_PER_DAY - 1)
+            await pipe.execute()
+
+    try:
+        await redis_call(record)
+    except Exception as e:
+        logger.debug("Failed to record search query: %s", e)
+
+
+async def popular_queries(limit: int, days: int = DAYS) -> list[str]:
+    """Самые частые запросы за последние days дней."""
+    if limit <= 0:
+        return []
+    keys = [_day_key(d) for d in range(days)]
+    union_key = f"{KEY_PREFIX}:top"
+
+    async def load(r):
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.zunionstore(union_key, keys)
+            pipe.expire(union_key, 3600)
+            pipe.zrevrange(union_key, 0, limit - 1)
+            _, _, top = await pipe.execute()
+        return top
+
+    try:
+        top = await redis_call(load)
+    except Exception as e:
+        logger.warning("Failed to load popular queries: %s", e)
+        return []
+    return [q.decode("utf-8") for q in top]
@@ -0,0 +1,22 @@
+from typing import Any
+
+from starlette.responses import Response
+
+from app.encoding import dumps
+
+
+class JSONResponse(Response):
+    """JSON через общий кодировщик (orjson): Decimal и datetime без jsonable_encoder.
+
+    Роут, который возвращает этот ответ сам, а не словарь, пропускает
+    jsonable_encoder FastAPI целиком.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Готовый JSON-документ (bytes) — отдаётся без повторной сериализации."""
+    media_type = "application/json"
@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
+from app.responses import JSONResponse
 from app.services.audiobook_service import AudiobookService
+from app.services.editions import EDITIONS_PAGE
 from app.templates import templates
 
 router = APIRouter()
@@ -15,7 +17,7 @@ async def audiobook_detail(
     db: AsyncSession = Depends(get_db)
 ):
     service = AudiobookService(db)
-    audiobook = await service.get_by_slug(slug)
+    audiobook = await service.get_detail(slug)
 
     if not audiobook:
         return templates.TemplateResponse(
@@ -31,3 +33,21 @@ async def audiobook_detail(
             "audiobook": audiobook,
         }
     )
+
+
+@router.get("/api/audiobook/{slug}/editions", response_class=JSONResponse, name="audiobook_editions_api")
+async def audiobook_editions_api(
+    slug: str,
+    offset: int = 0,
+    limit: int = EDITIONS_PAGE,
+    db: AsyncSession = Depends(get_db)
+):
+    """Текстовые издания книги после первых, показанных на странице"""
+    service = AudiobookService(db)
+    audiobook = await service.get_detail(slug)
+
+    if not audiobook:
+        return JSONResponse({"editions": [], "total": 0, "next_offset": None})
+
+    limit = min(max(limit, 1), 50)
+    return JSONResponse(await service.get_editions(audiobook.id, offset=max(offset, 0), limit=limit))
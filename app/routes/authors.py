@@ -1,44 +1,36 @@
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from app.config import settings
 from app.database import get_db
+from app.responses import JSONResponse, RawJSONResponse
 from app.services.author_service import AuthorService
-from app.models import Author
+from app.services.pagination import MAX_LIMIT
+from app.services.raw_json import RawJsonService
 from app.templates import templates
-from app.cache import cache_get, cache_set
-import json
 
 router = APIRouter()
 
 
-def get_last_name(full_name: str) -> str:
-    """Извлекает фамилию (последнее слово) из полного имени."""
-    return full_name.strip().split()[-1] if full_name else ""
-
-
 @router.get("/api/authors", response_class=JSONResponse, name="authors_list_api")
 async def authors_list_api(
     request: Request,
-    page: int = 1,
-    limit: int = 50,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=MAX_LIMIT),
     db: AsyncSession = Depends(get_db)
 ):
-    offset = (page - 1) * limit
-
-    result = await db.execute(
-        select(Author).order_by(Author.name).limit(limit).offset(offset)
-    )
-    authors = result.scalars().all()
+    if settings.json_api_raw:
+        return RawJSONResponse(await RawJsonService(db).authors_page(page=page, limit=limit))
 
-    total = await db.scalar(select(func.count(Author.id)))
+    data = await AuthorService(db).get_page(page=page, limit=limit)
+    total = data["total"]
 
-    return {
-        "authors": [{"name": a.name, "slug": a.slug} for a in authors],
+    return JSONResponse({
+        "authors": data["authors"],
         "total": total,
         "page": page,
         "pages": (total + limit - 1) // limit
-    }
+    })
 
 
 @router.get("/authors", response_class=HTMLResponse, name="authors_list")
@@ -50,31 +42,8 @@ async def authors_list(
 ):
     limit = 100
 
-    # Кешируем всех отсортированных авторов один раз
-    all_authors_cache_key = "all_authors_sorted"
-    cached_all = await cache_get(all_authors_cache_key)
-
-    if cached_all:
-        all_authors_data = json.loads(cached_all)
-    else:
-        # Получаем всех авторов из БД
-        query = select(Author)
-        result = await db.execute(query)
-        all_authors = result.scalars().all()
-
-        # Сортируем по фамилии один раз
-        sorted_authors = sorted(
-            all_authors,
-            key=lambda a: get_last_name(a.name).lower()
-        )
-
-        all_authors_data = [
-            {"id": a.id, "name": a.name, "slug": a.slug, "last_name": get_last_name(a.name)}
-            for a in sorted_authors
-        ]
-
-        # Кешируем на 1 час
-        await cache_set(all_authors_cache_key, json.dumps(all_authors_data), ttl=3600)
+    # Все авторы, отсортированные по фамилии (кешируются целиком)
+    all_authors_data = await AuthorService(db).get_all_sorted()
 
     # Фильтруем по букве (быстро, работаем с массивом в памяти)
     if letter:
@@ -95,7 +64,10 @@ async def authors_list(
     paginated_authors = filtered_authors[start:end]
 
     # Убираем last_name из ответа (он нужен только для фильтрации)
-    authors = [{"id": a["id"], "name": a["name"], "slug": a["slug"]} for a in paginated_authors]
+    authors = [
+        {"id": a["id"], "name": a["name"], "slug": a["slug"], "book_count": a["book_count"]}
+        for a in paginated_authors
+    ]
 
     return templates.TemplateResponse(
         "authors_list.html",
@@ -112,59 +84,28 @@ async def authors_list(
 @router.get("/api/author/{slug}/books", response_class=JSONResponse)
 async def author_books_api(
     slug: str,
-    offset: int = 0,
-    limit: int = 6,
+    cursor: str | None = None,
+    limit: int = Query(6, ge=1, le=MAX_LIMIT),
     db: AsyncSession = Depends(get_db)
 ):
     """API карусели для книг автора"""
-    from sqlalchemy import select, func
-    from sqlalchemy.orm import selectinload
-    from app.models import Audiobook
-
     service = AuthorService(db)
-    author = await service.get_by_slug(slug)
+    author = await service.get_summary_by_slug(slug)
 
     if not author:
-        return {"books": [], "has_more": False, "total": 0}
+        return JSONResponse({"books": [], "next_cursor": None, "has_more": False, "total": 0})
 
-    # Получаем общее количество книг
-    count_query = (
-        select(func.count(Audiobook.id))
-        .join(Audiobook.authors)
-        .where(Author.id == author.id)
-    )
-    total = await db.scalar(count_query)
-
-    # Получаем книги с пагинацией
-    query = (
-        select(Audiobook)
-        .join(Audiobook.authors)
-        .where(Author.id == author.id)
-        .options(selectinload(Audiobook.authors), selectinload(Audiobook.genres))
-        .order_by(Audiobook.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-    )
+    if settings.json_api_raw:
+        return RawJSONResponse(await RawJsonService(db).author_books(author["id"], cursor=cursor, limit=limit))
+
+    data = await service.get_audiobooks_after(author["id"], cursor=cursor, limit=limit)
 
-    result = await db.execute(query)
-    books = list(result.scalars().all())
-
-    return {
-        "books": [
-            {
-                "slug": b.slug,
-                "name": b.name,
-                "image_url": b.image_url,
-                "price": float(b.price),
-                "genres": [g.name for g in b.genres] if b.genres else [],
-                "fragment_url": b.fragment_url,
-                "authors": [a.name for a in b.authors],
-            }
-            for b in books
-        ],
-        "has_more": (offset + limit) < total,
-        "total": total
-    }
+    return JSONResponse({
+        "books": data["books"],
+        "next_cursor": data["next_cursor"],
+        "has_more": data["next_cursor"] is not None,
+        "total": author["book_count"]
+    })
 
 
 @router.get("/author/{slug}", response_class=HTMLResponse, name="author_detail")
@@ -175,7 +116,7 @@ async def author_detail(
     db: AsyncSession = Depends(get_db)
 ):
     service = AuthorService(db)
-    author = await service.get_by_slug(slug)
+    author = await service.get_summary_by_slug(slug)
 
     if not author:
         return templates.TemplateResponse(
@@ -184,37 +125,11 @@ async def author_detail(
             status_code=404
         )
 
-    cache_key = f"author_{slug}_books_{page}"
-    cached = await cache_get(cache_key)
-
-    if cached:
-        data = json.loads(cached)
-        audiobooks = data["audiobooks"]
-        total_pages = data["total_pages"]
-    else:
-        audiobooks_objs, total_pages = await service.get_audiobooks_paginated(
-            author_id=author.id,
-            page=page,
-            limit=24
-        )
-
-        cache_data = {
-            "audiobooks": [
-                {
-                    "id": book.id,
-                    "name": book.name,
-                    "slug": book.slug,
-                    "image_url": book.image_url,
-                    "price": float(book.price) if book.price else 0,
-                    "fragment_url": book.fragment_url,
-                    "formats": book.formats,
-                    "authors": [{"name": a.name, "slug": a.slug} for a in book.authors] if book.authors else [],
-                } for book in audiobooks_objs
-            ],
-            "total_pages": total_pages
-        }
-        await cache_set(cache_key, json.dumps(cache_data), ttl=600)
-        audiobooks = cache_data["audiobooks"]
+    audiobooks, total_pages = await service.get_audiobooks_paginated(
+        author_id=author["id"],
+        page=page,
+        limit=24
+    )
 
     return templates.TemplateResponse(
         "author_detail.html",
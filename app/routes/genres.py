@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from app.config import settings
 from app.database import get_db
+from app.responses import JSONResponse, RawJSONResponse
+from app.services.facets import Filters, facet_links
 from app.services.genre_service import GenreService
-from app.models import Genre
+from app.services.pagination import MAX_LIMIT
+from app.services.raw_json import RawJsonService
 from app.templates import templates
-from app.cache import cache_get, cache_set
-import json
 
 router = APIRouter()
 
@@ -15,25 +16,22 @@ router = APIRouter()
 @router.get("/api/genres", response_class=JSONResponse, name="genres_list_api")
 async def genres_list_api(
     request: Request,
-    page: int = 1,
-    limit: int = 50,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=MAX_LIMIT),
     db: AsyncSession = Depends(get_db)
 ):
-    offset = (page - 1) * limit
-
-    result = await db.execute(
-        select(Genre).where(Genre.parent_id == None).order_by(Genre.name).limit(limit).offset(offset)
-    )
-    genres = result.scalars().all()
+    if settings.json_api_raw:
+        return RawJSONResponse(await RawJsonService(db).root_genres_page(page=page, limit=limit))
 
-    total = await db.scalar(select(func.count(Genre.id)).where(Genre.parent_id == None))
+    data = await GenreService(db).get_root_genres_page(page=page, limit=limit)
+    total = data["total"]
 
-    return {
-        "genres": [{"name": g.name, "slug": g.slug} for g in genres],
+    return JSONResponse({
+        "genres": data["genres"],
         "total": total,
         "page": page,
         "pages": (total + limit - 1) // limit
-    }
+    })
 
 
 @router.get("/genres", response_class=HTMLResponse, name="genres_list")
@@ -41,34 +39,14 @@ async def genres_list(
     request: Request,
     db: AsyncSession = Depends(get_db)
 ):
-    cache_key = "genres_list_all"
-    cached = await cache_get(cache_key)
-
-    if cached:
-        data = json.loads(cached)
-        genres = data["genres"]
-        total = data["total"]
-    else:
-        result = await db.execute(
-            select(Genre).where(Genre.parent_id == None).order_by(Genre.name)
-        )
-        genres_objs = result.scalars().all()
-
-        total = len(genres_objs)
-
-        cache_data = {
-            "genres": [{"id": g.id, "name": g.name, "slug": g.slug} for g in genres_objs],
-            "total": total
-        }
-        await cache_set(cache_key, json.dumps(cache_data), ttl=600)
-        genres = cache_data["genres"]
+    genres = await GenreService(db).get_root_genres()
 
     return templates.TemplateResponse(
         "genres_list.html",
         {
             "request": request,
             "genres": genres,
-            "total": total,
+            "total": len(genres),
         }
     )
 
@@ -78,10 +56,16 @@ async def genre_detail(
     slug: str,
     request: Request,
     page: int = 1,
+    price: str | None = None,
+    format: str | None = None,
+    subgenre: str | None = Query(None, alias="genre"),
+    fragment: bool = False,
+    sort: str | None = None,
     db: AsyncSession = Depends(get_db)
 ):
+    filters = Filters.from_params(price=price, format=format, genre=subgenre, fragment=fragment, sort=sort)
     service = GenreService(db)
-    genre = await service.get_by_slug(slug)
+    genre = await service.get_summary_by_slug(slug)
 
     if not genre:
         return templates.TemplateResponse(
@@ -90,37 +74,13 @@ async def genre_detail(
             status_code=404
         )
 
-    cache_key = f"genre_{slug}_books_{page}"
-    cached = await cache_get(cache_key)
-
-    if cached:
-        data = json.loads(cached)
-        audiobooks = data["audiobooks"]
-        total_pages = data["total_pages"]
-    else:
-        audiobooks_objs, total_pages = await service.get_audiobooks_paginated(
-            genre_id=genre.id,
-            page=page,
-            limit=24
-        )
-
-        cache_data = {
-            "audiobooks": [
-                {
-                    "id": book.id,
-                    "name": book.name,
-                    "slug": book.slug,
-                    "image_url": book.image_url,
-                    "price": float(book.price) if book.price else 0,
-                    "fragment_url": book.fragment_url,
-                    "formats": book.formats,
-                    "authors": [{"name": a.name, "slug": a.slug} for a in book.authors] if book.authors else [],
-                } for book in audiobooks_objs
-            ],
-            "total_pages": total_pages
-        }
-        await cache_set(cache_key, json.dumps(cache_data), ttl=600)
-        audiobooks = cache_data["audiobooks"]
+    audiobooks, total_pages = await service.get_audiobooks_paginated(
+        genre_id=genre["id"],
+        page=page,
+        limit=24,
+        filters=filters
+    )
+    facets = await service.get_facets(genre_id=genre["id"], filters=filters)
 
     return templates.TemplateResponse(
         "genre_detail.html",
@@ -130,5 +90,6 @@ async def genre_detail(
             "audiobooks": audiobooks,
             "page": page,
             "total_pages": total_pages,
+            "facets": facet_links(facets, filters, f"/genre/{slug}"),
         }
     )
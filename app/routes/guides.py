@@ -3,10 +3,9 @@ import markdown
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db, get_redis
+from app.database import get_db
 from app.services.guide_service import GuideService
 from app.templates import templates
-from redis.asyncio import Redis
 
 router = APIRouter()
 
@@ -35,11 +34,10 @@ async def guides_list(
 async def guide_detail(
     slug: str,
     request: Request,
-    db: AsyncSession = Depends(get_db),
-    redis: Redis = Depends(get_redis)
+    db: AsyncSession = Depends(get_db)
 ):
     """Детальная страница подборки"""
-    service = GuideService(db, redis)
+    service = GuideService(db)
     guide = await service.get_by_slug(slug)
 
     if not guide:
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.autocomplete import autocomplete
 from app.database import get_db
-from app.services.search_service import SearchService
+from app.popular_queries import record_query
+from app.responses import JSONResponse
+from app.services.facets import NO_FILTERS, Filters, facet_links
+from app.services.pagination import page_number
+from app.services.search_service import SearchService, normalize_query
 from app.templates import templates
 
 router = APIRouter()
@@ -12,7 +17,12 @@ router = APIRouter()
 async def search(
     request: Request,
     q: str = "",
-    page: int = 1,
+    page: str | None = None,
+    price: str | None = None,
+    format: str | None = None,
+    genre: str | None = None,
+    fragment: bool = False,
+    sort: str | None = None,
     db: AsyncSession = Depends(get_db)
 ):
     if not q:
@@ -21,12 +31,22 @@ async def search(
             {"request": request, "audiobooks": [], "query": q}
         )
 
+    # HTML-страница: кривой номер страницы — первая страница, а не 422
+    page = page_number(page)
+    filters = Filters.from_params(price=price, format=format, genre=genre, fragment=fragment, sort=sort)
+    query = normalize_query(q)
     service = SearchService(db)
     audiobooks, total_pages = await service.search_audiobooks(
-        query=q,
+        query=query,
         page=page,
-        limit=24
+        limit=24,
+        filters=filters
     )
+    facets = await service.get_facets(query=query, filters=filters)
+
+    # Популярность считаем по первым страницам без фильтров — их и прогреваем
+    if audiobooks and page == 1 and filters == NO_FILTERS:
+        await record_query(query)
 
     return templates.TemplateResponse(
         "search.html",
@@ -36,6 +56,7 @@ async def search(
             "query": q,
             "page": page,
             "total_pages": total_pages,
+            "facets": facet_links(facets, filters, "/search", q=q),
         }
     )
 
@@ -46,9 +67,13 @@ async def api_search(
     db: AsyncSession = Depends(get_db)
 ):
     if not q or len(q) < 2:
-        return {"results": []}
+        return JSONResponse({"results": []})
 
-    service = SearchService(db)
-    results = await service.search_autocomplete(query=q, limit=10)
+    # Индекс в памяти; БД — пока он строится или если ничего не нашлось
+    # (там есть нечёткий поиск по опечаткам)
+    await autocomplete.ensure_fresh()
+    results = autocomplete.suggest(q, limit=10)
+    if not results:
+        results = await SearchService(db).search_autocomplete(query=q, limit=10)
 
-    return {"results": results}
+    return JSONResponse({"results": results})
@@ -1,16 +1,16 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from fastapi.responses import Response, PlainTextResponse
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
 from app.models import Audiobook, Author, Genre, Guide
-from app.cache import cache_get, cache_set
+from app.cache import get_or_load
 import os
 
 router = APIRouter()
 
 CACHE_TTL = 604800  # 7 дней
+STALE_TTL = 86400  # ещё сутки отдаём устаревший sitemap, пока он пересобирается
 CHUNK_SIZE = 30000  # Разбивка по 30к записей
 
 
@@ -32,17 +32,10 @@ def wrap_urlset(urls: str) -> str:
 </urlset>"""
 
 
-@router.get("/sitemap.xml")
-async def sitemap_index(db: AsyncSession = Depends(get_db)):
+async def build_sitemap_index(session: AsyncSession) -> str:
     """Главный sitemap index"""
-    cache_key = "sitemap_index"
-    cached = await cache_get(cache_key)
-
-    if cached:
-        return Response(content=cached, media_type="application/xml")
-
     # Считаем количество аудиокниг для разбивки
-    result = await db.execute(select(func.count(Audiobook.id)))
+    result = await session.execute(select(func.count(Audiobook.id)))
     total_audiobooks = result.scalar()
 
     # Количество файлов для аудиокниг
@@ -78,19 +71,18 @@ async def sitemap_index(db: AsyncSession = Depends(get_db)):
 {chr(10).join(sitemaps)}
 </sitemapindex>"""
 
-    await cache_set(cache_key, xml_content, ttl=CACHE_TTL)
-    return Response(content=xml_content, media_type="application/xml")
+    return xml_content
 
 
-@router.get("/sitemap_static.xml")
-async def sitemap_static():
-    """Sitemap для статических страниц"""
-    cache_key = "sitemap_static"
-    cached = await cache_get(cache_key)
+@router.get("/sitemap.xml")
+async def sitemap_index():
+    """Главный sitemap index"""
+    xml_content = await get_or_load("sitemap_index", build_sitemap_index, ttl=CACHE_TTL, stale_ttl=STALE_TTL)
+    return Response(content=xml_content, media_type="application/xml")
 
-    if cached:
-        return Response(content=cached, media_type="application/xml")
 
+async def build_sitemap_static(session: AsyncSession) -> str:
+    """Sitemap для статических страниц"""
     urls = [
         generate_url_entry("https://bigear.ru/", changefreq="daily", priority="1.0"),
         generate_url_entry("https://bigear.ru/authors", changefreq="weekly", priority="0.9"),
@@ -98,23 +90,21 @@ async def sitemap_static():
         generate_url_entry("https://bigear.ru/guides/", changefreq="weekly", priority="0.8"),
     ]
 
-    xml_content = wrap_urlset("\n".join(urls))
-    await cache_set(cache_key, xml_content, ttl=CACHE_TTL)
-    return Response(content=xml_content, media_type="application/xml")
+    return wrap_urlset("\n".join(urls))
 
 
-@router.get("/sitemap_audiobooks_{chunk}.xml")
-async def sitemap_audiobooks(chunk: int, db: AsyncSession = Depends(get_db)):
-    """Sitemap для аудиокниг (по чанкам)"""
-    cache_key = f"sitemap_audiobooks_{chunk}"
-    cached = await cache_get(cache_key)
+@router.get("/sitemap_static.xml")
+async def sitemap_static():
+    """Sitemap для статических страниц"""
+    xml_content = await get_or_load("sitemap_static", build_sitemap_static, ttl=CACHE_TTL, stale_ttl=STALE_TTL)
+    return Response(content=xml_content, media_type="application/xml")
 
-    if cached:
-        return Response(content=cached, media_type="application/xml")
 
+async def build_sitemap_audiobooks(session: AsyncSession, chunk: int) -> str:
+    """Sitemap для аудиокниг (по чанкам)"""
     offset = (chunk - 1) * CHUNK_SIZE
 
-    result = await db.execute(
+    result = await session.execute(
         select(Audiobook.slug, Audiobook.updated_at)
         .order_by(Audiobook.id)
         .offset(offset)
@@ -134,21 +124,24 @@ async def sitemap_audiobooks(chunk: int, db: AsyncSession = Depends(get_db)):
             )
         )
 
-    xml_content = wrap_urlset("\n".join(urls))
-    await cache_set(cache_key, xml_content, ttl=CACHE_TTL)
-    return Response(content=xml_content, media_type="application/xml")
+    return wrap_urlset("\n".join(urls))
 
 
-@router.get("/sitemap_authors.xml")
-async def sitemap_authors(db: AsyncSession = Depends(get_db)):
-    """Sitemap для авторов"""
-    cache_key = "sitemap_authors"
-    cached = await cache_get(cache_key)
+@router.get("/sitemap_audiobooks_{chunk}.xml")
+async def sitemap_audiobooks(chunk: int):
+    """Sitemap для аудиокниг (по чанкам)"""
+    xml_content = await get_or_load(
+        f"sitemap_audiobooks_{chunk}",
+        lambda session: build_sitemap_audiobooks(session, chunk),
+        ttl=CACHE_TTL,
+        stale_ttl=STALE_TTL,
+    )
+    return Response(content=xml_content, media_type="application/xml")
 
-    if cached:
-        return Response(content=cached, media_type="application/xml")
 
-    result = await db.execute(select(Author.slug))
+async def build_sitemap_authors(session: AsyncSession) -> str:
+    """Sitemap для авторов"""
+    result = await session.execute(select(Author.slug))
     authors = result.scalars().all()
 
     urls = [
@@ -160,21 +153,19 @@ async def sitemap_authors(db: AsyncSession = Depends(get_db)):
         for author in authors
     ]
 
-    xml_content = wrap_urlset("\n".join(urls))
-    await cache_set(cache_key, xml_content, ttl=CACHE_TTL)
-    return Response(content=xml_content, media_type="application/xml")
+    return wrap_urlset("\n".join(urls))
 
 
-@router.get("/sitemap_genres.xml")
-async def sitemap_genres(db: AsyncSession = Depends(get_db)):
-    """Sitemap для жанров"""
-    cache_key = "sitemap_genres"
-    cached = await cache_get(cache_key)
+@router.get("/sitemap_authors.xml")
+async def sitemap_authors():
+    """Sitemap для авторов"""
+    xml_content = await get_or_load("sitemap_authors", build_sitemap_authors, ttl=CACHE_TTL, stale_ttl=STALE_TTL)
+    return Response(content=xml_content, media_type="application/xml")
 
-    if cached:
-        return Response(content=cached, media_type="application/xml")
 
-    result = await db.execute(select(Genre.slug))
+async def build_sitemap_genres(session: AsyncSession) -> str:
+    """Sitemap для жанров"""
+    result = await session.execute(select(Genre.slug))
     genres = result.scalars().all()
 
     urls = [
@@ -186,21 +177,19 @@ async def sitemap_genres(db: AsyncSession = Depends(get_db)):
         for genre in genres
     ]
 
-    xml_content = wrap_urlset("\n".join(urls))
-    await cache_set(cache_key, xml_content, ttl=CACHE_TTL)
-    return Response(content=xml_content, media_type="application/xml")
+    return wrap_urlset("\n".join(urls))
 
 
-@router.get("/sitemap_articles.xml")
-async def sitemap_articles(db: AsyncSession = Depends(get_db)):
-    """Sitemap для статей"""
-    cache_key = "sitemap_articles"
-    cached = await cache_get(cache_key)
+@router.get("/sitemap_genres.xml")
+async def sitemap_genres():
+    """Sitemap для жанров"""
+    xml_content = await get_or_load("sitemap_genres", build_sitemap_genres, ttl=CACHE_TTL, stale_ttl=STALE_TTL)
+    return Response(content=xml_content, media_type="application/xml")
 
-    if cached:
-        return Response(content=cached, media_type="application/xml")
 
-    result = await db.execute(select(Guide.slug, Guide.updated_at))
+async def build_sitemap_articles(session: AsyncSession) -> str:
+    """Sitemap для статей"""
+    result = await session.execute(select(Guide.slug, Guide.updated_at))
     articles = result.all()
 
     urls = []
@@ -215,8 +204,13 @@ async def sitemap_articles(db: AsyncSession = Depends(get_db)):
             )
         )
 
-    xml_content = wrap_urlset("\n".join(urls))
-    await cache_set(cache_key, xml_content, ttl=CACHE_TTL)
+    return wrap_urlset("\n".join(urls))
+
+
+@router.get("/sitemap_articles.xml")
+async def sitemap_articles():
+    """Sitemap для статей"""
+    xml_content = await get_or_load("sitemap_articles", build_sitemap_articles, ttl=CACHE_TTL, stale_ttl=STALE_TTL)
     return Response(content=xml_content, media_type="application/xml")
 
 
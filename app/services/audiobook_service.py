@@ -1,7 +1,13 @@
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from app.cache import cached
 from app.models import Audiobook
+from app.services.book_detail import BookDetail, book_detail, load_detail_document
+from app.services.cards import with_cards
+from app.services.counting import cached_count
+from app.services.editions import EDITIONS_PAGE, Edition, editions_page
+from app.services.pagination import seek
 
 
 class AudiobookService:
@@ -14,33 +20,39 @@ class AudiobookService:
             .options(
                 selectinload(Audiobook.authors),
                 selectinload(Audiobook.genres),
-                selectinload(Audiobook.text_versions)
             )
             .where(Audiobook.slug == slug)
         )
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
-    async def get_paginated(
-        self,
-        page: int = 1,
-        limit: int = 24
-    ) -> tuple[list[Audiobook], int]:
-        offset = (page - 1) * limit
+    @cached(ttl=600, stale_ttl=600, tags=("catalog",))
+    async def get_detail_document(self, slug: str) -> dict | None:
+        """Книга, авторы, жанры и первые издания одним запросом (app/services/book_detail.py)."""
+        return await load_detail_document(self.db, slug)
 
-        query = (
-            select(Audiobook)
-            .options(selectinload(Audiobook.authors), selectinload(Audiobook.genres))
-            .order_by(Audiobook.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-        )
+    async def get_detail(self, slug: str) -> BookDetail | None:
+        """Всё для страницы книги; издания сверх первых — /api/audiobook/{slug}/editions."""
+        document = await self.get_detail_document(slug)
+        return book_detail(document) if document else None
 
-        result = await self.db.execute(query)
-        audiobooks = result.scalars().all()
+    @cached(ttl=600, stale_ttl=600, tags=("catalog",))
+    async def get_editions_document(self, audiobook_id: int, offset: int = 0, limit: int = EDITIONS_PAGE) -> dict:
+        return await editions_page(self.db, audiobook_id, offset, limit)
+
+    async def get_editions(self, audiobook_id: int, offset: int = 0, limit: int = EDITIONS_PAGE) -> dict:
+        page = await self.get_editions_document(audiobook_id, offset, limit)
+        return {**page, "editions": [Edition(**edition) for edition in page["editions"]]}
+
+    @cached(ttl=300, stale_ttl=300, tags=("catalog", "top_books"))
+    async def get_top_document(self, cursor: str | None = None, limit: int = 24) -> dict:
+        total = await cached_count(
+            "top_books", select(Audiobook.id).where(Audiobook.is_top == True), tags=("catalog", "top_books")
+        )
 
-        count_query = select(func.count(Audiobook.id))
-        total_count = await self.db.scalar(count_query)
-        total_pages = (total_count + limit - 1) // limit
+        page = await seek(self.db, Audiobook.is_top == True, cursor, limit)
+        return {**page, "total": total}
 
-        return list(audiobooks), total_pages
+    async def get_top(self, cursor: str | None = None, limit: int = 24) -> dict:
+        """Топовые книги (is_top) после курсора, курсор дальше и общее количество."""
+        return with_cards(await self.get_top_document(cursor, limit))
@@ -1,7 +1,21 @@
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from app.models import Author, Audiobook
+from app.cache import cached
+from app.models import Author, Audiobook, audiobook_author
+from app.services.cards import Card, card_from_dict, with_cards
+from app.services.counting import page_with_total
+from app.services.pagination import anchors, needs_anchors, numbered_page, seek
+
+
+def get_last_name(full_name: str) -> str:
+    """Извлекает фамилию (последнее слово) из полного имени."""
+    return full_name.strip().split()[-1] if full_name else ""
+
+
+def by_author(author_id: int):
+    return Audiobook.id.in_(
+        select(audiobook_author.c.audiobook_id).where(audiobook_author.c.author_id == author_id)
+    )
 
 
 class AuthorService:
@@ -13,33 +27,82 @@ class AuthorService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "authors"))
+    async def get_summary_by_slug(self, slug: str) -> dict | None:
+        """id, name и slug автора — всё, что нужно странице автора."""
+        author = await self.get_by_slug(slug)
+        if not author:
+            return None
+        return {"id": author.id, "name": author.name, "slug": author.slug, "book_count": author.book_count}
+
+    @cached(ttl=3600, stale_ttl=3600, tags=("catalog", "authors"))
+    async def get_all_sorted(self) -> list[dict]:
+        """Все авторы, отсортированные по фамилии."""
+        result = await self.db.execute(select(Author))
+        all_authors = result.scalars().all()
+
+        sorted_authors = sorted(
+            all_authors,
+            key=lambda a: get_last_name(a.name).lower()
+        )
+
+        return [
+            {
+                "id": a.id,
+                "name": a.name,
+                "slug": a.slug,
+                "last_name": get_last_name(a.name),
+                "book_count": a.book_count,
+            }
+            for a in sorted_authors
+        ]
+
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "authors"))
+    async def get_page(self, page: int = 1, limit: int = 50) -> dict:
+        offset = (page - 1) * limit
+
+        # Страница и total одним запросом на той же сессии: вложенный
+        # cached_count взял бы второе соединение, пока это занято
+        rows, total = await page_with_total(
+            self.db,
+            select(Author.name, Author.slug, Author.book_count).order_by(Author.name),
+            limit,
+            offset,
+        )
+
+        return {
+            "authors": [{"name": a.name, "slug": a.slug, "book_count": a.book_count} for a in rows],
+            "total": total,
+        }
+
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "authors"))
+    async def get_anchors(self, author_id: int, limit: int = 24) -> dict:
+        return await anchors(self.db, by_author(author_id), limit)
+
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "authors"))
+    async def get_audiobooks_page_document(self, author_id: int, page: int = 1, limit: int = 24) -> dict:
+        # Якоря из кеша — до первого запроса к self.db (см. numbered_page)
+        page_anchors = total = None
+        if needs_anchors(page, total_known=True):
+            page_anchors = await self.get_anchors(author_id, limit)
+        else:
+            total = await self.db.scalar(select(Author.book_count).where(Author.id == author_id))
+        books, pages = await numbered_page(self.db, by_author(author_id), page, limit, page_anchors, total)
+        return {"books": books, "pages": pages}
+
     async def get_audiobooks_paginated(
         self,
         author_id: int,
         page: int = 1,
         limit: int = 24
-    ) -> tuple[list[Audiobook], int]:
-        offset = (page - 1) * limit
-
-        audiobooks_query = (
-            select(Audiobook)
-            .join(Audiobook.authors)
-            .where(Author.id == author_id)
-            .options(selectinload(Audiobook.authors), selectinload(Audiobook.genres))
-            .order_by(Audiobook.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-        )
+    ) -> tuple[list[Card], int]:
+        found = await self.get_audiobooks_page_document(author_id, page, limit)
+        return [card_from_dict(book) for book in found["books"]], found["pages"]
 
-        result = await self.db.execute(audiobooks_query)
-        audiobooks = result.scalars().all()
-
-        count_query = (
-            select(func.count(Audiobook.id))
-            .join(Audiobook.authors)
-            .where(Author.id == author_id)
-        )
-        total_count = await self.db.scalar(count_query)
-        total_pages = (total_count + limit - 1) // limit
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "authors"))
+    async def get_audiobooks_after_document(self, author_id: int, cursor: str | None = None, limit: int = 24) -> dict:
+        return await seek(self.db, by_author(author_id), cursor, limit)
 
-        return list(audiobooks), total_pages
+    async def get_audiobooks_after(self, author_id: int, cursor: str | None = None, limit: int = 24) -> dict:
+        """Книги автора после курсора (для карусели) и курсор дальше."""
+        return with_cards(await self.get_audiobooks_after_document(author_id, cursor, limit))
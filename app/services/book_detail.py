@@ -0,0 +1,110 @@
+"""Страница книги одним запросом.
+
+Книга, авторы, жанры и первые EDITIONS_FIRST изданий собираются в один
+json-документ: авторы и жанры — коррелированные json_agg (как у карточек),
+издания — LATERAL-подзапрос с LIMIT и count(*) OVER() для total. Вместо
+строки книги и трёх selectinload — одно обращение к БД.
+
+Кешируется документ (словарь), шаблон получает BookDetail — неизменяемый
+объект без ORM-сессии за спиной. Сравнение со старым загрузчиком —
+scripts/bench_detail_loader.py.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import Float, cast, func, literal_column, outerjoin, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Audiobook, Author, Genre, TextBook, audiobook_author, audiobook_genre, audiobook_textbook
+from app.services.cards import Link, json_object, related_links
+from app.services.editions import EDITION_ORDER, EDITIONS_FIRST, Edition, edition_json
+
+
+@dataclass(frozen=True, slots=True)
+class BookDetail:
+    id: int
+    name: str
+    slug: str
+    description: Optional[str]
+    price: float
+    url: str
+    image_url: Optional[str]
+    formats: Optional[dict]
+    fragment_url: Optional[str]
+    authors: tuple[Link, ...]
+    genres: tuple[Link, ...]
+    editions: tuple[Edition, ...]
+    editions_total: int
+    # Смещение для /api/audiobook/{slug}/editions; None — все издания на странице
+    next_offset: Optional[int]
+
+
+def detail_query(slug: str):
+    editions = (
+        select(
+            edition_json().label("item"),
+            func.row_number().over(order_by=EDITION_ORDER).label("n"),
+            func.count().over().label("total"),
+        )
+        .select_from(audiobook_textbook.join(TextBook, TextBook.id == audiobook_textbook.c.textbook_id))
+        .where(audiobook_textbook.c.audiobook_id == Audiobook.id)
+        .order_by(*EDITION_ORDER)
+        .limit(EDITIONS_FIRST)
+        .lateral("editions")
+    )
+    return (
+        select(json_object(
+            id=Audiobook.id,
+            name=Audiobook.name,
+            slug=Audiobook.slug,
+            description=Audiobook.description,
+            price=func.coalesce(cast(Audiobook.price, Float), 0),
+            url=Audiobook.url,
+            image_url=Audiobook.image_url,
+            formats=Audiobook.formats,
+            fragment_url=Audiobook.fragment_url,
+            authors=related_links(
+                Author, audiobook_author, audiobook_author.c.author_id,
+                json_object(name=Author.name, slug=Author.slug),
+            ),
+            genres=related_links(
+                Genre, audiobook_genre, audiobook_genre.c.genre_id,
+                json_object(name=Genre.name, slug=Genre.slug),
+            ),
+            editions=func.coalesce(
+                func.json_agg(aggregate_order_by(editions.c.item, editions.c.n)).filter(editions.c.n != None),
+                literal_column("'[]'::json"),
+            ),
+            editions_total=func.coalesce(func.max(editions.c.total), 0),
+        ))
+        .select_from(outerjoin(Audiobook, editions, true()))
+        .where(Audiobook.slug == slug)
+        # Остальные колонки книги функционально зависят от первичного ключа
+        .group_by(Audiobook.id)
+    )
+
+
+async def load_detail_document(db: AsyncSession, slug: str) -> Optional[dict]:
+    return await db.scalar(detail_query(slug))
+
+
+def book_detail(document: dict) -> BookDetail:
+    total = document["editions_total"]
+    editions = tuple(Edition(**item) for item in document["editions"])
+    return BookDetail(
+        id=document["id"],
+        name=document["name"],
+        slug=document["slug"],
+        description=document["description"],
+        price=document["price"],
+        url=document["url"],
+        image_url=document["image_url"],
+        formats=document["formats"],
+        fragment_url=document["fragment_url"],
+        authors=tuple(Link(**link) for link in document["authors"]),
+        genres=tuple(Link(**link) for link in document["genres"]),
+        editions=editions,
+        editions_total=total,
+        next_offset=len(editions) if len(editions) < total else None,
+    )
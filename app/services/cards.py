@@ -0,0 +1,140 @@
+"""Карточки книг для списков, каруселей и JSON API.
+
+card_query выбирает только колонки карточки, а авторов и жанры собирает
+json_agg в том же запросе: страница — одно обращение к БД без загрузки
+description и без selectinload. Карточки — dataclass со __slots__:
+шаблоны читают их как атрибуты, orjson и FastAPI сериализуют как словари.
+
+card_json — та же карточка, собранная в json самим Postgres: для JSON API,
+которые отдают готовый документ без Python-объектов (app/services/raw_json.py).
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from sqlalchemy import JSON, Float, Select, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Audiobook, Author, Genre, audiobook_author, audiobook_genre
+
+
+@dataclass(slots=True)
+class Link:
+    name: str
+    slug: str
+
+
+@dataclass(slots=True)
+class Card:
+    id: int
+    name: str
+    slug: str
+    image_url: Optional[str]
+    price: float
+    fragment_url: Optional[str]
+    formats: Optional[dict]
+    authors: list[Link]
+    genres: list[Link]
+
+
+def json_object(**fields):
+    """json_build_object с ключами-константами прямо в тексте запроса."""
+    args = []
+    for key, value in fields.items():
+        args += [literal_column(f"'{key}'"), value]
+    return func.json_build_object(*args, type_=JSON)
+
+
+def related_links(model, link_table, link_column, item=None):
+    """[[name, slug], ...] связанных сущностей книги одним подзапросом."""
+    if item is None:
+        item = func.json_build_array(model.name, model.slug)
+    return (
+        select(func.coalesce(
+            func.json_agg(aggregate_order_by(item, model.id)),
+            literal_column("'[]'::json"),
+            type_=JSON,
+        ))
+        .select_from(link_table.join(model, model.id == link_column))
+        .where(link_table.c.audiobook_id == Audiobook.id)
+        .correlate(Audiobook)
+        .scalar_subquery()
+    )
+
+
+def card_query(*columns) -> Select:
+    """SELECT колонок карточки с авторами и жанрами; columns — дополнительные."""
+    return select(
+        Audiobook.id,
+        Audiobook.name,
+        Audiobook.slug,
+        Audiobook.image_url,
+        Audiobook.price,
+        Audiobook.fragment_url,
+        Audiobook.formats,
+        related_links(Author, audiobook_author, audiobook_author.c.author_id).label("authors"),
+        related_links(Genre, audiobook_genre, audiobook_genre.c.genre_id).label("genres"),
+        *columns,
+    )
+
+
+def card_json():
+    """Карточка как json-объект той же формы, что Card после сериализации."""
+    return json_object(
+        id=Audiobook.id,
+        name=Audiobook.name,
+        slug=Audiobook.slug,
+        image_url=Audiobook.image_url,
+        price=func.coalesce(cast(Audiobook.price, Float), 0),
+        fragment_url=Audiobook.fragment_url,
+        formats=Audiobook.formats,
+        authors=related_links(
+            Author, audiobook_author, audiobook_author.c.author_id,
+            json_object(name=Author.name, slug=Author.slug),
+        ),
+        genres=related_links(
+            Genre, audiobook_genre, audiobook_genre.c.genre_id,
+            json_object(name=Genre.name, slug=Genre.slug),
+        ),
+    )
+
+
+def card_from_row(row) -> Card:
+    return Card(
+        id=row.id,
+        name=row.name,
+        slug=row.slug,
+        image_url=row.image_url,
+        price=float(row.price) if row.price else 0,
+        fragment_url=row.fragment_url,
+        formats=row.formats,
+        authors=[Link(name, slug) for name, slug in row.authors],
+        genres=[Link(name, slug) for name, slug in row.genres],
+    )
+
+
+def card_from_dict(data: dict) -> Card:
+    """Card из значения кеша: кеш отдаёт карточки словарями."""
+    return Card(**{
+        **data,
+        "authors": [Link(**link) for link in data["authors"]],
+        "genres": [Link(**link) for link in data["genres"]],
+    })
+
+
+def with_cards(page: dict) -> dict:
+    """Страница из кеша ({"books": [...], ...}) с карточками-объектами."""
+    return {**page, "books": [card_from_dict(book) for book in page["books"]]}
+
+
+async def fetch_cards(db: AsyncSession, query: Select) -> list[Card]:
+    result = await db.execute(query)
+    return [card_from_row(row) for row in result]
+
+
+async def load_cards(db: AsyncSession, ids: Sequence[int]) -> list[Card]:
+    """Карточки книг по списку id одним запросом, в порядке ids."""
+    if not ids:
+        return []
+    cards = {card.id: card for card in await fetch_cards(db, card_query().where(Audiobook.id.in_(ids)))}
+    return [cards[i] for i in ids if i in cards]
@@ -0,0 +1,83 @@
+"""Стратегии подсчёта total для пагинации.
+
+Точный count(*) по join'у на каждый запрос часто дороже самой страницы,
+поэтому каждая точка вызова выбирает способ явно:
+
+- cached_count — точное число, кешируется по сущности (жанр, автор, топ)
+  и сбрасывается вместе с поколением каталога после импорта;
+- estimated_count — оценка планировщика из EXPLAIN для больших выборок,
+  где точное число всё равно округляется до «много страниц»;
+- page_with_total — count(*) OVER() в запросе страницы: строки и total
+  за одно обращение к БД.
+"""
+from typing import Sequence
+
+from sqlalchemy import Row, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.cache import get_or_load, tag_prefix
+from app.config import settings
+from app.encoding import loads
+
+
+async def exact_count(db: AsyncSession, query: Select) -> int:
+    return await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+
+async def cached_count(key: str, query: Select, tags: Sequence[str] = ("catalog",)) -> int:
+    """Точный count(*) строк query, кешированный под ключом сущности."""
+    async def loader(session: AsyncSession) -> int:
+        return await exact_count(session, query)
+
+    return await get_or_load(
+        f"{await tag_prefix(tags)}|count:{key}",
+        loader,
+        ttl=settings.count_cache_ttl,
+        stale_ttl=settings.count_cache_ttl,
+    )
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    # Параметры запроса остаются bind-параметрами, а не подставляются в текст
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def estimated_count(db: AsyncSession, query: Select) -> int:
+    """Оценка числа строк query планировщиком; маленькие выборки — точно.
+
+    Оценка стоит одного планирования без выполнения. Ниже
+    count_estimate_threshold она слишком неточна для номера последней
+    страницы, а точный count там дешёв.
+    """
+    plan = await db.scalar(_Explain(query.order_by(None)))
+    if isinstance(plan, str):
+        plan = loads(plan)
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate >= settings.count_estimate_threshold:
+        return estimate
+    return await exact_count(db, query)
+
+
+async def page_with_total(db: AsyncSession, query: Select, limit: int, offset: int = 0) -> tuple[list[Row], int]:
+    """Строки страницы и total одним запросом (count(*) OVER()).
+
+    Окно считается до LIMIT, поэтому total — по всей выборке. Если
+    страница за концом выборки, строк нет — total считается отдельно.
+    """
+    result = await db.execute(
+        query.add_columns(func.count().over().label("total")).limit(limit).offset(offset)
+    )
+    rows = result.all()
+    if not rows:
+        return [], await exact_count(db, query) if offset else 0
+    return rows, rows[0].total
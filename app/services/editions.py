@@ -0,0 +1,92 @@
+"""Текстовые издания аудиокниги (TextBook) для страницы книги.
+
+У популярной классики изданий десятки, а description каждого — до 50k
+символов. Страница книги показывает первые EDITIONS_FIRST изданий, и из
+описания в выборку попадает только начало (EDITION_SUMMARY_CHARS символов,
+обрезается в Postgres). Остальные издания подгружает
+/api/audiobook/{slug}/editions.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import TextBook, audiobook_textbook
+from app.services.cards import json_object
+from app.services.counting import page_with_total
+
+EDITIONS_FIRST = 5
+EDITIONS_PAGE = 10
+EDITION_SUMMARY_CHARS = 300
+
+# Порядок — как у связи Audiobook.text_versions, id делает его однозначным
+EDITION_ORDER = (TextBook.year.desc(), TextBook.price, TextBook.id)
+
+
+@dataclass(slots=True)
+class Edition:
+    id: int
+    name: str
+    price: Optional[float]
+    url: str
+    image_url: Optional[str]
+    formats: Optional[str]
+    publisher: Optional[str]
+    year: Optional[int]
+    summary: Optional[str]
+
+
+def edition_json():
+    """Издание как json-объект той же формы, что Edition после сериализации."""
+    return json_object(
+        id=TextBook.id,
+        name=TextBook.name,
+        price=cast(TextBook.price, Float),
+        url=TextBook.url,
+        image_url=TextBook.image_url,
+        formats=TextBook.formats,
+        publisher=TextBook.publisher,
+        year=TextBook.year,
+        summary=func.left(TextBook.description, EDITION_SUMMARY_CHARS),
+    )
+
+
+def _editions_query(audiobook_id: int):
+    return (
+        select(
+            TextBook.id,
+            TextBook.name,
+            TextBook.price,
+            TextBook.url,
+            TextBook.image_url,
+            TextBook.formats,
+            TextBook.publisher,
+            TextBook.year,
+            func.left(TextBook.description, EDITION_SUMMARY_CHARS).label("summary"),
+        )
+        .join(audiobook_textbook, audiobook_textbook.c.textbook_id == TextBook.id)
+        .where(audiobook_textbook.c.audiobook_id == audiobook_id)
+        .order_by(*EDITION_ORDER)
+    )
+
+
+async def editions_page(db: AsyncSession, audiobook_id: int, offset: int = 0, limit: int = EDITIONS_PAGE) -> dict:
+    """{"editions", "total", "next_offset"}; next_offset None — изданий больше нет."""
+    rows, total = await page_with_total(db, _editions_query(audiobook_id), limit, offset)
+    editions = [
+        Edition(
+            id=row.id,
+            name=row.name,
+            price=float(row.price) if row.price is not None else None,
+            url=row.url,
+            image_url=row.image_url,
+            formats=row.formats,
+            publisher=row.publisher,
+            year=row.year,
+            summary=row.summary,
+        )
+        for row in rows
+    ]
+    next_offset = offset + len(editions)
+    return {"editions": editions, "total": total, "next_offset": next_offset if next_offset < total else None}
@@ -0,0 +1,243 @@
+"""Фасетные фильтры каталога: цена, формат, поджанр, наличие фрагмента.
+
+Счётчики всех фасетов считаются одним запросом: подходящие книги
+собираются в CTE один раз, а для каждого фасета — GROUP BY по нему с
+остальными активными фильтрами. Так у каждого значения фасета видно,
+сколько книг останется, если выбрать его вместо текущего.
+"""
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlencode
+
+from sqlalchemy import String, and_, case, cast, distinct, exists, func, literal, select, true, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Audiobook, Genre, audiobook_genre, genre_closure
+from app.services.genre_tree import in_genre_subtree_by_slug
+
+# (ключ, подпись, от, до не включая)
+PRICE_BUCKETS = [
+    ("0-199", "до 200 ₽", None, 200),
+    ("200-399", "200–400 ₽", 200, 400),
+    ("400-699", "400–700 ₽", 400, 700),
+    ("700+", "от 700 ₽", 700, None),
+]
+_PRICE_RANGES = {key: (lo, hi) for key, _, lo, hi in PRICE_BUCKETS}
+
+SORTS = {
+    "new": "Сначала новые",
+    "price_asc": "Сначала дешёвые",
+    "price_desc": "Сначала дорогие",
+}
+# Сортировки не по дате: для них keyset-курсоры по (created_at, id) не подходят
+PRICE_SORTS = ("price_asc", "price_desc")
+
+# Сколько жанров показывать в фасете поиска
+GENRE_FACET_LIMIT = 15
+
+
+@dataclass(frozen=True)
+class Filters:
+    """Выбранные фильтры и сортировка. repr входит в ключ кеша."""
+    price: Optional[str] = None
+    format: Optional[str] = None
+    genre: Optional[str] = None
+    fragment: bool = False
+    sort: Optional[str] = None
+
+    @classmethod
+    def from_params(
+        cls,
+        price: Optional[str] = None,
+        format: Optional[str] = None,
+        genre: Optional[str] = None,
+        fragment: bool = False,
+        sort: Optional[str] = None,
+    ) -> "Filters":
+        """Фильтры из query-параметров; неизвестные значения отбрасываются."""
+        format = (format or "").strip().lower()[:20] or None
+        return cls(
+            price=price if price in _PRICE_RANGES else None,
+            format=format,
+            genre=(genre or "").strip()[:255] or None,
+            fragment=bool(fragment),
+            sort=sort if sort in SORTS else None,
+        )
+
+    def conditions(self) -> dict:
+        """Условия активных фильтров по фасетам."""
+        conditions = {}
+        if self.price:
+            lo, hi = _PRICE_RANGES[self.price]
+            # Диапазон по цене использует idx_audiobook_price
+            conditions["price"] = and_(
+                Audiobook.price >= lo if lo is not None else true(),
+                Audiobook.price < hi if hi is not None else true(),
+            )
+        if self.format:
+            values = func.json_array_elements_text(Audiobook.formats["formats"]).table_valued("value").alias("fmt")
+            conditions["format"] = exists(
+                select(1).select_from(values).where(func.lower(func.trim(values.c.value)) == self.format)
+            )
+        if self.genre:
+            # Жанр вместе с поджанрами — как на странице этого жанра
+            conditions["genre"] = in_genre_subtree_by_slug(self.genre)
+        if self.fragment:
+            conditions["fragment"] = Audiobook.fragment_url.isnot(None)
+        return conditions
+
+    def order_by(self, default: tuple) -> tuple:
+        if self.sort == "price_asc":
+            return (Audiobook.price.asc(), Audiobook.id)
+        if self.sort == "price_desc":
+            return (Audiobook.price.desc(), Audiobook.id)
+        if self.sort == "new":
+            return (Audiobook.created_at.desc(), Audiobook.id.desc())
+        return default
+
+    def params(self, **changes) -> dict:
+        """Query-параметры фильтров (с заменой отдельных значений)."""
+        values = {
+            "price": self.price,
+            "format": self.format,
+            "genre": self.genre,
+            "fragment": 1 if self.fragment else None,
+            "sort": self.sort,
+        }
+        values.update(changes)
+        return {k: v for k, v in values.items() if v}
+
+    def query_string(self, **changes) -> str:
+        return urlencode(self.params(**changes))
+
+
+NO_FILTERS = Filters()
+
+
+def _price_bucket():
+    whens = [(Audiobook.price < hi, key) for key, _, _, hi in PRICE_BUCKETS if hi is not None]
+    return case(*whens, else_=PRICE_BUCKETS[-1][0])
+
+
+class FacetService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def counts(self, condition, filters: Filters, genre_parent_id: Optional[int] = None) -> dict:
+        """Счётчики фасетов для книг, подходящих под condition.
+
+        genre_parent_id — на странице жанра фасет показывает его поджанры;
+        без него (поиск) — самые частые жанры среди найденного.
+        """
+        conditions = filters.conditions()
+        base = (
+            select(
+                Audiobook.id,
+                Audiobook.formats,
+                Audiobook.fragment_url.isnot(None).label("has_fragment"),
+                _price_bucket().label("bucket"),
+                *(c.label(f"{facet}_ok") for facet, c in conditions.items()),
+            )
+            .where(condition)
+            .cte("base")
+        )
+
+        def others(facet: Optional[str] = None):
+            """Все активные фильтры, кроме фильтра самого фасета."""
+            return and_(true(), *(base.c[f"{f}_ok"] for f in conditions if f != facet))
+
+        no_label = cast(None, String)
+        formats = func.json_array_elements_text(base.c.formats["formats"]).table_valued("value").lateral("fmt")
+        format_key = func.lower(func.trim(formats.c.value))
+
+        # Жанр считает книги своего поддерева: совпадает с выдачей при выборе
+        genre_query = (
+            select(literal("genre"), Genre.slug, Genre.name, func.count(distinct(base.c.id)))
+            .select_from(
+                base.join(audiobook_genre, audiobook_genre.c.audiobook_id == base.c.id)
+                .join(genre_closure, genre_closure.c.descendant_id == audiobook_genre.c.genre_id)
+                .join(Genre, Genre.id == genre_closure.c.ancestor_id)
+            )
+            .where(others("genre"))
+            .group_by(Genre.slug, Genre.name)
+        )
+        if genre_parent_id is not None:
+            genre_query = genre_query.where(Genre.parent_id == genre_parent_id)
+
+        query = union_all(
+            select(literal("total"), literal(""), no_label, func.count()).select_from(base).where(others()),
+            select(literal("price"), base.c.bucket, no_label, func.count())
+            .where(others("price")).group_by(base.c.bucket),
+            select(literal("format"), format_key, no_label, func.count())
+            .select_from(base.join(formats, true()))
+            .where(others("format")).group_by(format_key),
+            select(literal("fragment"), literal(""), no_label, func.count())
+            .select_from(base).where(others("fragment"), base.c.has_fragment),
+            genre_query,
+        )
+
+        rows = (await self.db.execute(query)).all()
+        return _collect(rows, genre_parent_id is None)
+
+
+def _collect(rows, limit_genres: bool) -> dict:
+    facets = {"total": 0, "prices": {}, "formats": [], "fragment": 0, "genres": []}
+    for facet, key, label, count in rows:
+        if facet == "total":
+            facets["total"] = count
+        elif facet == "price":
+            facets["prices"][key] = count
+        elif facet == "format" and key:
+            facets["formats"].append({"key": key, "count": count})
+        elif facet == "fragment":
+            facets["fragment"] = count
+        elif facet == "genre":
+            facets["genres"].append({"key": key, "label": label, "count": count})
+
+    facets["prices"] = [
+        {"key": key, "label": label, "count": facets["prices"].get(key, 0)}
+        for key, label, _, _ in PRICE_BUCKETS
+    ]
+    facets["formats"].sort(key=lambda f: -f["count"])
+    facets["genres"].sort(key=lambda g: -g["count"])
+    if limit_genres:
+        facets["genres"] = facets["genres"][:GENRE_FACET_LIMIT]
+    return facets
+
+
+def facet_links(facets: dict, filters: Filters, base_url: str, **params) -> dict:
+    """Добавляет к значениям фасетов ссылки (выбор/снятие) и отметку selected.
+
+    Ссылки строятся после кеша: счётчики общие, а params (например q)
+    у каждого запроса свои. Смена фильтра сбрасывает страницу.
+    """
+    def url(**changes) -> str:
+        query = {**params, **filters.params(**changes)}
+        return f"{base_url}?{urlencode(query)}" if query else base_url
+
+    def options(items: list[dict], field: str) -> list[dict]:
+        current = getattr(filters, field)
+        return [
+            {**item, "selected": item["key"] == current,
+             "url": url(**{field: None if item["key"] == current else item["key"]})}
+            for item in items
+        ]
+
+    return {
+        "total": facets["total"],
+        "prices": options(facets["prices"], "price"),
+        "formats": options(facets["formats"], "format"),
+        "genres": options(facets["genres"], "genre"),
+        "fragment": {
+            "count": facets["fragment"],
+            "selected": filters.fragment,
+            "url": url(fragment=None if filters.fragment else 1),
+        },
+        "sorts": [
+            {"key": key, "label": label, "selected": filters.sort == key, "url": url(sort=key)}
+            for key, label in SORTS.items()
+        ],
+        "reset_url": url(price=None, format=None, genre=None, fragment=None, sort=None),
+        "active": bool(filters.params()),
+        "page_params": urlencode({**params, **filters.params()}),
+    }
@@ -1,7 +1,12 @@
-from sqlalchemy import select, func
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from app.models import Genre, Audiobook
+from app.cache import cached
+from app.models import Genre
+from app.services.cards import Card, card_from_dict, card_from_row, card_query
+from app.services.counting import page_with_total
+from app.services.facets import NO_FILTERS, PRICE_SORTS, FacetService, Filters
+from app.services.genre_tree import ancestors_query, in_genre_subtree
+from app.services.pagination import KEYSET_ORDER, anchors, needs_anchors, numbered_page, total_pages
 
 
 class GenreService:
@@ -13,33 +18,95 @@ class GenreService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "genres"))
+    async def get_summary_by_slug(self, slug: str) -> dict | None:
+        """Жанр и его предки для хлебных крошек — всё, что нужно странице жанра."""
+        genre = await self.get_by_slug(slug)
+        if not genre:
+            return None
+        ancestors = await self.db.execute(ancestors_query(genre.id))
+        return {
+            "id": genre.id,
+            "name": genre.name,
+            "slug": genre.slug,
+            "book_count": genre.book_count,
+            "ancestors": [{"name": name, "slug": slug} for name, slug in ancestors.all()],
+        }
+
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "genres"))
+    async def get_root_genres(self) -> list[dict]:
+        result = await self.db.execute(
+            select(Genre).where(Genre.parent_id == None).order_by(Genre.name)
+        )
+        return [
+            {"id": g.id, "name": g.name, "slug": g.slug, "book_count": g.book_count}
+            for g in result.scalars().all()
+        ]
+
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "genres"))
+    async def get_root_genres_page(self, page: int = 1, limit: int = 50) -> dict:
+        offset = (page - 1) * limit
+
+        rows, total = await page_with_total(
+            self.db,
+            select(Genre.name, Genre.slug, Genre.book_count).where(Genre.parent_id == None).order_by(Genre.name),
+            limit,
+            offset,
+        )
+
+        return {
+            "genres": [{"name": g.name, "slug": g.slug, "book_count": g.book_count} for g in rows],
+            "total": total,
+        }
+
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "genres"))
+    async def get_anchors(self, genre_id: int, filters: Filters = NO_FILTERS, limit: int = 24) -> dict:
+        return await anchors(self.db, and_(in_genre_subtree(genre_id), *filters.conditions().values()), limit)
+
     async def get_audiobooks_paginated(
         self,
         genre_id: int,
         page: int = 1,
-        limit: int = 24
-    ) -> tuple[list[Audiobook], int]:
-        offset = (page - 1) * limit
+        limit: int = 24,
+        filters: Filters = NO_FILTERS,
+    ) -> tuple[list[Card], int]:
+        found = await self.get_audiobooks_page_document(genre_id, page, limit, filters)
+        return [card_from_dict(book) for book in found["books"]], found["pages"]
 
-        audiobooks_query = (
-            select(Audiobook)
-            .join(Audiobook.genres)
-            .where(Genre.id == genre_id)
-            .options(selectinload(Audiobook.authors), selectinload(Audiobook.genres))
-            .order_by(Audiobook.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-        )
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "genres"))
+    async def get_audiobooks_page_document(
+        self,
+        genre_id: int,
+        page: int = 1,
+        limit: int = 24,
+        filters: Filters = NO_FILTERS,
+    ) -> dict:
+        condition = and_(in_genre_subtree(genre_id), *filters.conditions().values())
+        if filters.sort in PRICE_SORTS:
+            books, pages = await self._price_sorted_page(condition, filters, page, limit)
+            return {"books": books, "pages": pages}
 
-        result = await self.db.execute(audiobooks_query)
-        audiobooks = result.scalars().all()
+        # Якоря из кеша — до первого запроса к self.db (см. numbered_page).
+        # Без фильтров число книг уже посчитано импортом (genres.book_count)
+        page_anchors = total = None
+        if needs_anchors(page, total_known=filters == NO_FILTERS):
+            page_anchors = await self.get_anchors(genre_id, filters, limit)
+        else:
+            total = await self.db.scalar(select(Genre.book_count).where(Genre.id == genre_id))
+        books, pages = await numbered_page(self.db, condition, page, limit, page_anchors, total)
+        return {"books": books, "pages": pages}
 
-        count_query = (
-            select(func.count(Audiobook.id))
-            .join(Audiobook.genres)
-            .where(Genre.id == genre_id)
+    async def _price_sorted_page(self, condition, filters: Filters, page: int, limit: int) -> tuple[list[Card], int]:
+        """Сортировка по цене не совпадает с порядком курсоров — обычный OFFSET."""
+        rows, total_count = await page_with_total(
+            self.db,
+            card_query().where(condition).order_by(*filters.order_by(KEYSET_ORDER)),
+            limit,
+            (page - 1) * limit,
         )
-        total_count = await self.db.scalar(count_query)
-        total_pages = (total_count + limit - 1) // limit
+        return [card_from_row(row) for row in rows], total_pages(total_count, limit)
 
-        return list(audiobooks), total_pages
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "genres"))
+    async def get_facets(self, genre_id: int, filters: Filters = NO_FILTERS) -> dict:
+        """Фасеты книг жанра; жанровый фасет — его поджанры."""
+        return await FacetService(self.db).counts(in_genre_subtree(genre_id), filters, genre_parent_id=genre_id)
@@ -0,0 +1,33 @@
+"""Поддеревья и пути жанров через таблицу замыкания genre_closure."""
+from sqlalchemy import Select, select
+
+from app.models import Audiobook, Genre, audiobook_genre, genre_closure
+
+
+def subtree_book_ids(*ancestor_conditions) -> Select:
+    """id книг, привязанных к жанрам-потомкам (включая сам жанр)."""
+    return (
+        select(audiobook_genre.c.audiobook_id)
+        .join(genre_closure, genre_closure.c.descendant_id == audiobook_genre.c.genre_id)
+        .where(*ancestor_conditions)
+    )
+
+
+def in_genre_subtree(genre_id: int):
+    """Книги жанра и всех его поджанров — один индексный join."""
+    return Audiobook.id.in_(subtree_book_ids(genre_closure.c.ancestor_id == genre_id))
+
+
+def in_genre_subtree_by_slug(slug: str):
+    genre_id = select(Genre.id).where(Genre.slug == slug).scalar_subquery()
+    return Audiobook.id.in_(subtree_book_ids(genre_closure.c.ancestor_id == genre_id))
+
+
+def ancestors_query(genre_id: int) -> Select:
+    """Предки жанра от корня (без самого жанра) для хлебных крошек."""
+    return (
+        select(Genre.name, Genre.slug)
+        .join(genre_closure, genre_closure.c.ancestor_id == Genre.id)
+        .where(genre_closure.c.descendant_id == genre_id, genre_closure.c.depth > 0)
+        .order_by(genre_closure.c.depth.desc())
+    )
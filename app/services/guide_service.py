@@ -1,13 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app.cache import redis_call
 from app.models import Guide
-from redis.asyncio import Redis
 
 
 class GuideService:
-    def __init__(self, db: AsyncSession, redis: Redis = None):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.redis = redis
 
     async def get_all(self, limit: int = 100, offset: int = 0):
         """Получить список всех подборок"""
@@ -28,12 +27,17 @@ class GuideService:
 
     async def increment_views(self, guide_id: int, client_ip: str):
         """Увеличить счётчик просмотров (ограничение по IP)"""
-        if self.redis:
-            cache_key = f"guide_view:{guide_id}:{client_ip}"
-            exists = await self.redis.exists(cache_key)
-            if exists:
-                return
-            await self.redis.setex(cache_key, 3600, "1")
+        cache_key = f"guide_view:{guide_id}:{client_ip}"
+        try:
+            # SET NX: проверка и отметка просмотра за один вызов; таймаут
+            # и circuit breaker — как у кеша
+            is_new_view = await redis_call(lambda r: r.set(cache_key, "1", nx=True, ex=3600))
+        except Exception:
+            # Без проверки каждый запрос считался бы новым просмотром —
+            # пока Redis недоступен, просмотры не считаем
+            return
+        if not is_new_view:
+            return
 
         guide = await self.db.get(Guide, guide_id)
         if guide:
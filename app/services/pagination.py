@@ -0,0 +1,177 @@
+"""Keyset-пагинация списков книг по (created_at, id).
+
+Вместо OFFSET страница начинается сразу за последней книгой предыдущей:
+WHERE (created_at, id) < (:created_at, :id) — это поиск по индексу
+ix_audiobooks_created_id, и страница 2000 стоит столько же, сколько первая.
+
+JSON API отдают непрозрачный курсор следующей страницы. HTML-страницы
+с номерами переводятся в курсоры через якоря: курсоры каждой ANCHOR_EVERY-й
+страницы считаются одним проходом по индексу и кешируются, а от якоря до
+нужной страницы остаётся OFFSET не больше ANCHOR_EVERY страниц. Первым
+ANCHOR_EVERY страницам якоря не нужны, если total известен заранее
+(book_count жанра или автора).
+"""
+import base64
+import binascii
+import struct
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Audiobook
+from app.services.cards import Card, card_from_row, card_query
+
+# Порядок всех списков: новые сначала, id различает книги одного импорта
+KEYSET_ORDER = (Audiobook.created_at.desc(), Audiobook.id.desc())
+
+# Якорь на каждую ANCHOR_EVERY-ю страницу
+ANCHOR_EVERY = 10
+
+# Наибольший limit страницы JSON API
+MAX_LIMIT = 100
+
+# Курсор: микросекунды created_at и id книги, base64url без паддинга
+_CURSOR = struct.Struct(">qI")
+_EPOCH = datetime(1970, 1, 1)
+
+Cursor = tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, book_id: int) -> str:
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(_CURSOR.pack(micros, book_id)).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """Позиция из курсора; пустой или испорченный курсор — начало списка."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        micros, book_id = _CURSOR.unpack(raw)
+        return _EPOCH + timedelta(microseconds=micros), book_id
+    except (binascii.Error, struct.error, ValueError, OverflowError):
+        return None
+
+
+def after_cursor(position: Cursor):
+    created_at, book_id = position
+    return tuple_(Audiobook.created_at, Audiobook.id) < tuple_(literal(created_at), literal(book_id))
+
+
+async def seek(
+    db: AsyncSession,
+    condition,
+    cursor: Optional[str] = None,
+    limit: int = 24,
+    skip: int = 0,
+) -> dict:
+    """Книги после курсора и курсор следующей страницы (None — конец).
+
+    skip — строки от курсора до начала страницы (только для якорей).
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be positive, got {limit}")
+    query = (
+        card_query(Audiobook.created_at)
+        .where(condition)
+        .order_by(*KEYSET_ORDER)
+        .offset(skip)
+        .limit(limit + 1)
+    )
+    position = decode_cursor(cursor)
+    if position is not None:
+        query = query.where(after_cursor(position))
+
+    rows = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {"books": [card_from_row(row) for row in rows], "next_cursor": next_cursor}
+
+
+async def anchors(db: AsyncSession, condition, limit: int) -> dict:
+    """Курсоры страниц ANCHOR_EVERY+1, 2*ANCHOR_EVERY+1, ... и число книг.
+
+    Один проход по (created_at, id) без загрузки строк книг; заодно
+    считается total — отдельный count(*) не нужен.
+    """
+    step = limit * ANCHOR_EVERY
+    numbered = (
+        select(
+            Audiobook.created_at,
+            Audiobook.id,
+            func.row_number().over(order_by=KEYSET_ORDER).label("n"),
+            func.count().over().label("total"),
+        )
+        .where(condition)
+        .subquery()
+    )
+    result = await db.execute(
+        select(numbered.c.created_at, numbered.c.id, numbered.c.n, numbered.c.total)
+        .where((numbered.c.n == 1) | (numbered.c.n % step == 0))
+        .order_by(numbered.c.n)
+    )
+    rows = result.all()
+
+    return {
+        "total": rows[0].total if rows else 0,
+        # Курсор последней книги страницы — начало следующей за ней
+        "cursors": [encode_cursor(row.created_at, row.id) for row in rows if row.n % step == 0],
+    }
+
+
+def page_number(value: Optional[str]) -> int:
+    """Номер страницы из query string: мусор и числа меньше 1 — первая страница."""
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def total_pages(total: int, limit: int) -> int:
+    return (total + limit - 1) // limit
+
+
+def needs_anchors(page: int, total_known: bool) -> bool:
+    """Нужны ли странице якоря: она дальше первых ANCHOR_EVERY или total неизвестен."""
+    return page > ANCHOR_EVERY or not total_known
+
+
+async def numbered_page(
+    db: AsyncSession,
+    condition,
+    page: int,
+    limit: int,
+    page_anchors: Optional[dict],
+    total: Optional[int] = None,
+) -> tuple[list[Card], int]:
+    """Страница по номеру для HTML: якорь + короткий OFFSET от него.
+
+    page_anchors — результат anchors(), если needs_anchors(), иначе None.
+    Кешированные якоря вызывающий загружает до первого запроса к db:
+    промах кеша берёт собственное соединение, и держать два сразу
+    одной загрузке страницы незачем.
+    """
+    anchor, rest = divmod(page - 1, ANCHOR_EVERY)
+    if total is None:
+        total = page_anchors["total"]
+
+    pages = total_pages(total, limit)
+    if page < 1 or page > pages:
+        return [], pages
+
+    cursor = None
+    if anchor:
+        cursors = page_anchors["cursors"]
+        if anchor > len(cursors):
+            return [], pages
+        cursor = cursors[anchor - 1]
+
+    found = await seek(db, condition, cursor, limit, rest * limit)
+    return found["books"], pages
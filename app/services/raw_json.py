@@ -0,0 +1,144 @@
+"""JSON API без Python-объектов: документ целиком собирает Postgres.
+
+Запрос возвращает готовый JSON (json_agg / json_build_object) как bytea,
+методы кешируют эти байты как есть, а роуты отдают их RawJSONResponse —
+ни ORM-объектов, ни словарей, ни повторного json.dumps. Форма документов
+та же, что у обычного пути через карточки. Сравнение —
+scripts/bench_json_api.py.
+"""
+from typing import Optional
+
+from sqlalchemy import Integer, LargeBinary, Text, cast, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import cached
+from app.models import Audiobook, Author, Genre
+from app.services.author_service import by_author
+from app.services.cards import card_json, json_object
+from app.services.pagination import KEYSET_ORDER, after_cursor, decode_cursor, encode_cursor
+
+
+def _json_array(item, order):
+    return func.coalesce(func.json_agg(aggregate_order_by(item, order)), literal_column("'[]'::json"))
+
+
+def _as_bytes(document):
+    """json -> UTF-8 bytea: драйвер отдаёт bytes без декодирования."""
+    return func.convert_to(cast(document, Text), "UTF8", type_=LargeBinary)
+
+
+def _seek_page(condition, cursor: Optional[str], limit: int):
+    """limit + 1 карточек после курсора, пронумерованных в порядке списка."""
+    query = (
+        select(
+            card_json().label("card"),
+            Audiobook.created_at,
+            Audiobook.id,
+            func.row_number().over(order_by=KEYSET_ORDER).label("n"),
+        )
+        .where(condition)
+        .order_by(*KEYSET_ORDER)
+        .limit(limit + 1)
+    )
+    position = decode_cursor(cursor)
+    if position is not None:
+        query = query.where(after_cursor(position))
+    return query.subquery()
+
+
+class RawJsonService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def seek_document(self, condition, cursor: Optional[str], limit: int, total) -> bytes:
+        """{"books", "next_cursor", "has_more", "total"} — как у seek().
+
+        Книги и total приходят из БД готовым JSON; Python только дописывает
+        курсор, который кодируется так же, как в pagination.encode_cursor.
+        """
+        if limit < 1:
+            raise ValueError(f"limit must be positive, got {limit}")
+        page = _seek_page(condition, cursor, limit)
+        on_page = page.c.n <= limit
+        result = await self.db.execute(
+            select(
+                _as_bytes(func.coalesce(
+                    func.json_agg(aggregate_order_by(page.c.card, page.c.n)).filter(on_page),
+                    literal_column("'[]'::json"),
+                )),
+                func.count(),
+                func.max(page.c.created_at).filter(page.c.n == limit),
+                func.max(page.c.id).filter(page.c.n == limit),
+                cast(total, Integer),
+            )
+        )
+        books, rows, last_created_at, last_id, total = result.one()
+
+        if rows > limit:
+            next_cursor = b'"' + encode_cursor(last_created_at, last_id).encode("ascii") + b'"'
+            has_more = b"true"
+        else:
+            next_cursor, has_more = b"null", b"false"
+        return b"".join((
+            b'{"books":', books,
+            b',"next_cursor":', next_cursor,
+            b',"has_more":', has_more,
+            b',"total":', str(total or 0).encode("ascii"), b"}",
+        ))
+
+    @cached(ttl=300, stale_ttl=300, tags=("catalog", "top_books"))
+    async def top_books(self, cursor: Optional[str] = None, limit: int = 24) -> bytes:
+        # total — подзапросом в том же запросе: cached_count внутри загрузчика
+        # взял бы второе соединение, пока это занято
+        total = select(func.count(Audiobook.id)).where(Audiobook.is_top == True).scalar_subquery()
+        return await self.seek_document(Audiobook.is_top == True, cursor, limit, total)
+
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "authors"))
+    async def author_books(self, author_id: int, cursor: Optional[str] = None, limit: int = 24) -> bytes:
+        total = select(Author.book_count).where(Author.id == author_id).scalar_subquery()
+        return await self.seek_document(by_author(author_id), cursor, limit, total)
+
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "authors"))
+    async def authors_page(self, page: int = 1, limit: int = 50) -> bytes:
+        """{"authors", "total", "page", "pages"} — как у /api/authors."""
+        authors = (
+            select(
+                json_object(name=Author.name, slug=Author.slug, book_count=Author.book_count).label("item"),
+                func.row_number().over(order_by=Author.name).label("n"),
+            )
+            .order_by(Author.name)
+            .limit(limit)
+            .offset((page - 1) * limit)
+            .subquery()
+        )
+        total = select(func.count(Author.id)).scalar_subquery()
+        return await self.db.scalar(select(_as_bytes(json_object(
+            authors=_json_array(authors.c.item, authors.c.n),
+            total=total,
+            page=literal(page),
+            pages=(total + limit - 1) // limit,
+        ))))
+
+    @cached(ttl=600, stale_ttl=600, tags=("catalog", "genres"))
+    async def root_genres_page(self, page: int = 1, limit: int = 50) -> bytes:
+        """{"genres", "total", "page", "pages"} — как у /api/genres."""
+        root = Genre.parent_id == None
+        genres = (
+            select(
+                json_object(name=Genre.name, slug=Genre.slug, book_count=Genre.book_count).label("item"),
+                func.row_number().over(order_by=Genre.name).label("n"),
+            )
+            .where(root)
+            .order_by(Genre.name)
+            .limit(limit)
+            .offset((page - 1) * limit)
+            .subquery()
+        )
+        total = select(func.count(Genre.id)).where(root).scalar_subquery()
+        return await self.db.scalar(select(_as_bytes(json_object(
+            genres=_json_array(genres.c.item, genres.c.n),
+            total=total,
+            page=literal(page),
+            pages=(total + limit - 1) // limit,
+        ))))
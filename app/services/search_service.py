@@ -1,61 +1,250 @@
-from sqlalchemy import select, func
+import base64
+import re
+from array import array
+from functools import reduce
+from sqlalchemy import select, func, case, exists, false, literal, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from app.models import Audiobook
+from app.cache import cached
+from app.config import settings
+from app.models import Audiobook, Author, audiobook_author
+from app.services.cards import Card, load_cards
+from app.services.counting import estimated_count
+from app.services.facets import NO_FILTERS, FacetService, Filters
+from app.utils import slugify, switch_keyboard_layout
+
+_WORD_RE = re.compile(r"\w+")
+_SPACES_RE = re.compile(r"\s+")
+
+# Сколько id выдачи хранить в кеше на запрос; дальние страницы идут в БД
+SEARCH_ID_LIMIT = 1000
+MAX_QUERY_LENGTH = 100
+
+
+def normalize_query(query: str) -> str:
+    """Ключ запроса: «Гарри  Поттер » и «гарри поттер» — одна выдача."""
+    return _SPACES_RE.sub(" ", query).strip().lower()[:MAX_QUERY_LENGTH]
+
+
+def pack_ids(ids: list[int]) -> str:
+    """id выдачи — 4 байта на книгу (array('I')) в base64 для JSON-кеша."""
+    return base64.b64encode(array("I", ids).tobytes()).decode("ascii")
+
+
+def unpack_ids(packed: str) -> array:
+    ids = array("I")
+    ids.frombytes(base64.b64decode(packed))
+    return ids
+
+
+def query_forms(query: str) -> tuple[list[str], list[str]]:
+    """Варианты запроса для поиска одним запросом к БД.
+
+    Названия ищем как введено и в другой раскладке («vfcnth» → «мастер»).
+    Латиницу («master i margarita») — по slug: это название, прогнанное
+    через unidecode в slugify, поэтому транслит находится без словарей.
+    """
+    names = [query]
+    switched = switch_keyboard_layout(query)
+    if switched and switched != query:
+        names.append(switched)
+
+    slugs = []
+    for name in names:
+        slug = slugify(name)
+        if len(slug) >= 3 and slug not in slugs:
+            slugs.append(slug)
+    return names, slugs
+
+
+def _any_of(queries):
+    return reduce(lambda a, b: a.op("||")(b), queries)
+
+
+def fulltext_query(query: str):
+    """tsquery по обеим конфигурациям индекса: словоформы и точные слова."""
+    return func.websearch_to_tsquery("russian", query).op("||")(
+        func.websearch_to_tsquery("simple", query)
+    )
+
+
+def prefix_query(query: str):
+    """tsquery для подсказок: последнее слово может быть недописано."""
+    words = _WORD_RE.findall(query.lower())
+    if not words:
+        return None
+    return func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+
+
+def fuzzy_match(queries: list[str]):
+    """Нечёткий поиск по названию и авторам (pg_trgm, оператор <%).
+
+    Ранг — лучшее сходство любого из вариантов запроса со словами
+    названия или имени автора.
+    """
+    author_similarity = (
+        select(func.max(func.greatest(*(func.word_similarity(q, Author.name) for q in queries))))
+        .join(audiobook_author, audiobook_author.c.author_id == Author.id)
+        .where(audiobook_author.c.audiobook_id == Audiobook.id)
+        .scalar_subquery()
+    )
+    by_author = Audiobook.id.in_(
+        select(audiobook_author.c.audiobook_id)
+        .join(Author, Author.id == audiobook_author.c.author_id)
+        .where(or_(*(literal(q).bool_op("<%")(Author.name) for q in queries)))
+    )
+    condition = or_(*(literal(q).bool_op("<%")(Audiobook.name) for q in queries), by_author)
+    rank = func.greatest(
+        *(func.word_similarity(q, Audiobook.name) for q in queries),
+        func.coalesce(author_similarity, 0),
+    )
+    return condition, (rank.desc(), Audiobook.created_at.desc())
 
 
 class SearchService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def _match(self, query: str, prefix: bool = False, fuzzy: bool = False):
+        """Условие поиска и порядок выдачи для выбранного движка.
+
+        Все варианты запроса (query_forms) объединяются через OR в одно
+        условие. prefix — для подсказок: последнее слово может быть недописано.
+        """
+        names, slugs = query_forms(query)
+        by_slug = [Audiobook.slug.ilike(f"%{slug}%") for slug in slugs]
+
+        if fuzzy or settings.search_engine == "fuzzy":
+            # Порог действует до конца транзакции и только для этой сессии
+            await self.db.execute(select(func.set_config(
+                "pg_trgm.word_similarity_threshold", str(settings.search_fuzzy_threshold), True
+            )))
+            return fuzzy_match(names)
+
+        if settings.search_engine == "fulltext":
+            tsqueries = [q for q in map(prefix_query if prefix else fulltext_query, names) if q is not None]
+            if not tsqueries and not by_slug:
+                return false(), ()
+            conditions = list(by_slug)
+            rank = literal(0)
+            if tsqueries:
+                tsquery = _any_of(tsqueries)
+                conditions.append(Audiobook.search_vector.bool_op("@@")(tsquery))
+                rank = func.ts_rank(Audiobook.search_vector, tsquery)
+            return or_(*conditions), (rank.desc(), Audiobook.created_at.desc())
+
+        # Подстрока: ILIKE использует триграммные GIN-индексы по названию и slug.
+        # Совпадения с запросом как он введён — выше исправленных вариантов
+        exact = case((Audiobook.name.ilike(f"%{query}%"), 0), else_=1)
+        condition = or_(*(Audiobook.name.ilike(f"%{name}%") for name in names), *by_slug)
+        return condition, (exact, Audiobook.created_at.desc())
+
+    def _fuzzy_fallback(self) -> bool:
+        return settings.search_fuzzy_fallback and settings.search_engine != "fuzzy"
+
+    async def _resolve(self, query: str):
+        """Условие поиска; если точный поиск пуст — нечёткий (опечатка)."""
+        condition, order_by = await self._match(query)
+        if self._fuzzy_fallback() and not await self.db.scalar(select(exists().where(condition))):
+            condition, order_by = await self._match(query, fuzzy=True)
+        return condition, order_by
+
+    @cached(ttl=300, stale_ttl=300, tags=("catalog", "search"))
+    async def search_ids(self, query: str, filters: Filters = NO_FILTERS) -> dict:
+        """Первые SEARCH_ID_LIMIT id выдачи в порядке ранга и общее число.
+
+        Любая страница запроса — срез этого списка, поэтому дорогие
+        условие и подсчёт выполняются один раз на запрос, а не на страницу.
+        Число книг оценивается, только если выдача не уместилась в список.
+        """
+        condition, order_by = await self._resolve(query)
+        filter_conditions = filters.conditions().values()
+        result = await self.db.execute(
+            select(Audiobook.id)
+            .where(condition, *filter_conditions)
+            .order_by(*filters.order_by(order_by))
+            .limit(SEARCH_ID_LIMIT)
+        )
+        ids = list(result.scalars().all())
+
+        total = len(ids)
+        if total == SEARCH_ID_LIMIT:
+            # Дальше 1000-й книги точное число страниц никому не нужно
+            total = max(total, await estimated_count(
+                self.db, select(Audiobook.id).where(condition, *filter_conditions)
+            ))
+        return {"ids": pack_ids(ids), "total": total}
+
+    async def _page_ids(self, query: str, filters: Filters, offset: int, limit: int) -> list[int]:
+        """id страницы за пределами кешированного списка — напрямую из БД."""
+        condition, order_by = await self._resolve(query)
+        result = await self.db.execute(
+            select(Audiobook.id)
+            .where(condition, *filters.conditions().values())
+            .order_by(*filters.order_by(order_by))
+            .limit(limit)
+            .offset(offset)
+        )
+        return list(result.scalars().all())
+
     async def search_audiobooks(
         self,
         query: str,
         page: int = 1,
-        limit: int = 24
-    ) -> tuple[list[Audiobook], int]:
-        offset = (page - 1) * limit
+        limit: int = 24,
+        filters: Filters = NO_FILTERS,
+    ) -> tuple[list[Card], int]:
+        query = normalize_query(query)
+        # Отрицательный offset вырезал бы страницу с конца списка id
+        offset = (max(page, 1) - 1) * limit
+        found = await self.search_ids(query, filters)
+        total_count = found["total"]
 
-        search_query = (
-            select(Audiobook)
-            .where(Audiobook.name.ilike(f"%{query}%"))
-            .options(selectinload(Audiobook.authors), selectinload(Audiobook.genres))
-            .order_by(Audiobook.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-        )
+        if not total_count:
+            return [], 0
 
-        result = await self.db.execute(search_query)
-        audiobooks = result.scalars().all()
+        if offset + limit <= SEARCH_ID_LIMIT or offset >= total_count:
+            page_ids = unpack_ids(found["ids"])[offset:offset + limit].tolist()
+        else:
+            page_ids = await self._page_ids(query, filters, offset, limit)
 
-        count_query = select(func.count(Audiobook.id)).where(
-            Audiobook.name.ilike(f"%{query}%")
-        )
-        total_count = await self.db.scalar(count_query)
         total_pages = (total_count + limit - 1) // limit
+        return await load_cards(self.db, page_ids), total_pages
 
-        return list(audiobooks), total_pages
+    @cached(ttl=300, stale_ttl=300, tags=("catalog", "search"))
+    async def get_facets(self, query: str, filters: Filters = NO_FILTERS) -> dict:
+        condition, _ = await self._resolve(query)
+        return await FacetService(self.db).counts(condition, filters)
 
-    async def search_autocomplete(self, query: str, limit: int = 10) -> list[dict]:
+    async def _autocomplete(self, query: str, limit: int, fuzzy: bool = False) -> list[Audiobook]:
+        condition, order_by = await self._match(query, prefix=True, fuzzy=fuzzy)
         search_query = (
             select(Audiobook)
-            .where(Audiobook.name.ilike(f"%{query}%"))
+            .where(condition)
             .options(selectinload(Audiobook.authors))
-            .order_by(Audiobook.created_at.desc())
+            .order_by(*order_by)
             .limit(limit)
         )
 
         result = await self.db.execute(search_query)
-        audiobooks = result.scalars().all()
+        return result.scalars().all()
+
+    @cached(ttl=60, tags=("catalog", "search"))
+    async def search_autocomplete(self, query: str, limit: int = 10) -> list[dict]:
+        audiobooks = await self._autocomplete(query, limit)
+        if not audiobooks and self._fuzzy_fallback():
+            audiobooks = await self._autocomplete(query, limit, fuzzy=True)
 
         return [
             {
+                "type": "audiobook",
                 "id": book.id,
                 "slug": book.slug,
                 "name": book.name,
                 "authors": ", ".join([a.name for a in book.authors]) if book.authors else "",
                 "price": float(book.price),
                 "image_url": book.image_url or "",
+                "url": f"/audiobook/{book.slug}",
             }
             for book in audiobooks
         ]
@@ -1,6 +1,9 @@
 """Общий экземпляр шаблонов для всего приложения."""
 from fastapi.templating import Jinja2Templates
 from datetime import datetime
+from app.config import settings
+from app.encoding import dumps_str
+from app.page_cache import canonical_page_query
 
 
 def format_price(value):
@@ -10,6 +13,27 @@ def format_price(value):
     return str(value)
 
 
+SITE_URL = settings.site_url.rstrip("/")
+
+
+def canonical_url(request) -> str:
+    """Адрес страницы от settings.site_url, а не от Host и схемы запроса.
+
+    Страница попадает в кеш страниц, поэтому в HTML не должно быть ничего
+    из запроса, что не входит в ключ: query string — канонический, как
+    в ключе (для некешируемых страниц — как пришёл).
+    """
+    query = canonical_page_query(request.url.path, request.scope["query_string"])
+    if query is None:
+        query = request.url.query
+    return f"{SITE_URL}{request.url.path}" + (f"?{query}" if query else "")
+
+
 templates = Jinja2Templates(directory="templates")
 templates.env.globals["now"] = datetime.now
+templates.env.globals["site_url"] = SITE_URL
+templates.env.globals["canonical_url"] = canonical_url
 templates.env.filters["price"] = format_price
+# tojson через общий кодировщик; экранирование <, >, &, ' остаётся за Jinja2
+templates.env.policies["json.dumps_function"] = dumps_str
+templates.env.policies["json.dumps_kwargs"] = {}
@@ -10,6 +10,25 @@ def slugify(text: str) -> str:
     return text[:200]
 
 
+# Одни и те же клавиши в раскладках QWERTY и ЙЦУКЕН
+_LATIN_KEYS = "qwertyuiop[]asdfghjkl;'zxcvbnm,.`QWERTYUIOP{}ASDFGHJKL:\"ZXCVBNM<>~"
+_CYRILLIC_KEYS = "йцукенгшщзхъфывапролджэячсмитьбюёЙЦУКЕНГШЩЗХЪФЫВАПРОЛДЖЭЯЧСМИТЬБЮЁ"
+_TO_CYRILLIC = str.maketrans(_LATIN_KEYS, _CYRILLIC_KEYS)
+_TO_LATIN = str.maketrans(_CYRILLIC_KEYS, _LATIN_KEYS)
+
+
+def switch_keyboard_layout(text: str) -> str | None:
+    """Текст, набранный не в той раскладке: «vfcnth» → «мастер» и обратно.
+
+    None, если в тексте смешаны латиница и кириллица или нет букв.
+    """
+    has_latin = re.search(r'[a-zA-Z]', text) is not None
+    has_cyrillic = re.search(r'[а-яА-ЯёЁ]', text) is not None
+    if has_latin == has_cyrillic:
+        return None
+    return text.translate(_TO_CYRILLIC if has_latin else _TO_LATIN)
+
+
 def normalize_title(title: str) -> str:
     """Нормализация названия для сопоставления аудио и текстовых книг."""
     if not title:
@@ -0,0 +1,168 @@
+"""Прогрев кеша горячих страниц после деплоя и импорта.
+
+Заполняет те же ключи, что читают роуты: главная, списки жанров и авторов,
+страницы корневых жанров, первые страницы самых больших жанров и авторов
+и выдачи популярных поисковых запросов.
+Вызовы идут через кешируемые методы сервисов, поэтому ключи совпадают с
+ключами роутов, а одновременные промахи разных воркеров схлопываются
+single-flight-блокировкой.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy import select, func
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models import Author, Genre, audiobook_author, audiobook_genre
+from app.popular_queries import popular_queries
+from app.services.audiobook_service import AudiobookService
+from app.services.author_service import AuthorService
+from app.services.genre_service import GenreService
+from app.services.raw_json import RawJsonService
+from app.services.search_service import SearchService
+
+Job = Callable[[], Awaitable[object]]
+
+PAGE_SIZE = 24
+
+
+async def _largest(column, limit: int) -> list[int]:
+    """id жанров или авторов с наибольшим числом книг."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(column).group_by(column).order_by(func.count().desc()).limit(limit)
+        )
+        return list(result.scalars().all())
+
+
+async def _slugs(model, ids: list[int]) -> dict[int, str]:
+    if not ids:
+        return {}
+    async with async_session_maker() as session:
+        result = await session.execute(select(model.id, model.slug).where(model.id.in_(ids)))
+        return dict(result.all())
+
+
+async def warm_cache(
+    genres: int | None = None,
+    authors: int | None = None,
+    pages: int | None = None,
+    concurrency: int | None = None,
+    queries: int | None = None,
+) -> dict:
+    """Прогревает кеш и возвращает статистику: задачи, ошибки, время."""
+    genres = settings.cache_warmup_genres if genres is None else genres
+    authors = settings.cache_warmup_authors if authors is None else authors
+    pages = settings.cache_warmup_pages if pages is None else pages
+    concurrency = settings.cache_warmup_concurrency if concurrency is None else concurrency
+    queries = settings.cache_warmup_queries if queries is None else queries
+
+    # Каждый промах берёт соединение из пула — ограничиваем параллельность,
+    # чтобы прогрев не вытеснил живые запросы
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"jobs": 0, "failed": 0}
+    started = time.perf_counter()
+
+    async def run(job: Job):
+        async with semaphore:
+            stats["jobs"] += 1
+            try:
+                return await job()
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"Прогрев: ошибка {e!r}")
+                return None
+
+    def service(cls) -> Callable[[Callable], Job]:
+        """Вызов метода сервиса на собственной сессии."""
+        def bind(call: Callable) -> Job:
+            async def job():
+                async with async_session_maker() as session:
+                    return await call(cls(session))
+            return job
+        return bind
+
+    audiobooks = service(AudiobookService)
+    genre_service = service(GenreService)
+    author_service = service(AuthorService)
+    search_service = service(SearchService)
+    raw_json = service(RawJsonService)
+
+    # /api/genres и /api/authors читают RawJsonService, если json_api_raw
+    if settings.json_api_raw:
+        genres_api = raw_json(lambda s: s.root_genres_page(page=1, limit=50))
+        authors_api = raw_json(lambda s: s.authors_page(page=1, limit=50))
+    else:
+        genres_api = genre_service(lambda s: s.get_root_genres_page(page=1, limit=50))
+        authors_api = author_service(lambda s: s.get_page(page=1, limit=50))
+
+    # Страницы без параметров: главная, /genres, /authors
+    root_genres, *_ = await asyncio.gather(
+        run(genre_service(lambda s: s.get_root_genres())),
+        run(audiobooks(lambda s: s.get_top(limit=PAGE_SIZE))),
+        run(genres_api),
+        run(author_service(lambda s: s.get_all_sorted())),
+        run(authors_api),
+    )
+
+    async def largest(model, column, limit: int) -> dict[int, str]:
+        return await _slugs(model, await _largest(column, limit))
+
+    largest_genres, largest_authors = await asyncio.gather(
+        run(lambda: largest(Genre, audiobook_genre.c.genre_id, genres)),
+        run(lambda: largest(Author, audiobook_author.c.author_id, authors)),
+    )
+
+    # Корневые жанры — первая страница, крупнейшие — первые pages страниц
+    genre_pages = {g["slug"]: 1 for g in root_genres or []}
+    for slug in (largest_genres or {}).values():
+        genre_pages[slug] = max(pages, genre_pages.get(slug, 0))
+
+    async def warm_listing(bind: Callable[[Callable], Job], load: Callable, page_count: int):
+        """Первая страница, затем остальные — но не дальше последней."""
+        first = await run(bind(lambda s: load(s, 1)))
+        if not first:
+            return
+        _, total_pages = first
+        await asyncio.gather(*(
+            run(bind(lambda s, p=page: load(s, p)))
+            for page in range(2, min(page_count, total_pages) + 1)
+        ))
+
+    async def warm_genre(slug: str, page_count: int):
+        genre = await run(genre_service(lambda s: s.get_summary_by_slug(slug)))
+        if genre:
+            await run(genre_service(lambda s: s.get_facets(genre_id=genre["id"])))
+            await warm_listing(
+                genre_service,
+                lambda s, p: s.get_audiobooks_paginated(genre_id=genre["id"], page=p, limit=PAGE_SIZE),
+                page_count,
+            )
+
+    async def warm_author(slug: str):
+        author = await run(author_service(lambda s: s.get_summary_by_slug(slug)))
+        if author:
+            await warm_listing(
+                author_service,
+                lambda s, p: s.get_audiobooks_paginated(author_id=author["id"], page=p, limit=PAGE_SIZE),
+                pages,
+            )
+
+    async def warm_query(query: str):
+        # Список id выдачи и фасеты — всё, что нужно первым страницам
+        await asyncio.gather(
+            run(search_service(lambda s: s.search_ids(query))),
+            run(search_service(lambda s: s.get_facets(query=query))),
+        )
+
+    await asyncio.gather(
+        *(warm_genre(slug, count) for slug, count in genre_pages.items()),
+        *(warm_author(slug) for slug in (largest_authors or {}).values()),
+        *(warm_query(query) for query in await popular_queries(queries)),
+    )
+
+    stats["elapsed"] = round(time.perf_counter() - started, 3)
+    print(f"Прогрев кеша: {stats['jobs']} ключей за {stats['elapsed']} с, ошибок: {stats['failed']}")
+    return stats
@@ -0,0 +1,101 @@
+"""Отчёт о памяти индекса подсказок /api/search.
+
+По умолчанию строит индекс из БД, как это делает воркер при старте.
+С --synthetic N строит его из N сгенерированных названий — для оценки
+на объёмах, которых ещё нет в базе.
+
+Замер на синтетических данных (Python 3.11, названия по 2–8 слов из
+словаря в 60 тыс. слов, автор на книгу — каждый четвёртый уникален):
+
+    книг     слов   записи книг   всего   подсказка
+    100 000  59 тыс.    27 МБ      51 МБ     ~30 мкс
+    300 000  59 тыс.    83 МБ     120 МБ     ~75 мкс
+    500 000  59 тыс.   138 МБ     186 МБ     ~90 мкс
+
+Почти всё — записи выдачи (название, slug, авторы, обложка). Сам
+префиксный индекс — слова, позиции и готовые топы коротких префиксов —
+на 300 тыс. книг занимает ~20 МБ. Индекс строится в каждом воркере,
+поэтому на сервере эти числа умножаются на число воркеров.
+"""
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.autocomplete import TOP_BOOST, Autocomplete, pack, unpack
+
+
+def synthetic(autocomplete: Autocomplete, count: int, seed: int = 1):
+    rng = random.Random(seed)
+    letters = "абвгдежзийклмнопрстуфхцчшщыэюя"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 11))) for _ in range(60000)]
+    authors = [
+        (float(rng.randint(1, 50)), pack(i, f"{rng.choice(vocabulary).title()} {rng.choice(vocabulary).title()}", f"author-{i}"))
+        for i in range(max(count // 4, 1))
+    ]
+    genres = [(float(rng.randint(1, 5000)), pack(i, rng.choice(vocabulary).title(), f"genre-{i}")) for i in range(400)]
+
+    books = []
+    for book_id in range(count):
+        name = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(2, 8))).capitalize()
+        author = unpack(rng.choice(authors)[1])[1]
+        record = pack(
+            book_id, name, f"{name.lower().replace(' ', '-')}-{book_id}", author,
+            round(rng.uniform(99, 999), 2), f"https://cdn.litres.ru/pub/c/cover_415/{book_id}.jpg",
+        )
+        books.append(((TOP_BOOST if rng.random() < 0.002 else 0) + book_id, record))
+
+    autocomplete.books, autocomplete._book_keys, autocomplete.authors, autocomplete.genres = autocomplete.build(
+        books, authors, genres
+    )
+
+
+def print_report(report: dict):
+    for name in ("books", "authors", "genres"):
+        part = report.get(name)
+        if not part:
+            continue
+        print(f"{name}: {part['entries']:,} записей, {part['words']:,} слов, {part['postings']:,} позиций")
+        for key, value in part.items():
+            if key.endswith("_bytes"):
+                print(f"    {key:<16} {value / 1024 / 1024:>9.1f} МБ")
+    print(f"book_keys          {report['book_keys_bytes'] / 1024 / 1024:>9.1f} МБ")
+    print(f"всего              {report['total_bytes'] / 1024 / 1024:>9.1f} МБ")
+
+
+def measure_queries(autocomplete: Autocomplete, repeat: int = 2000):
+    words = autocomplete.books.words
+    rng = random.Random(2)
+    queries = [rng.choice(words)[:n] for n in (1, 2, 3, 4, 6) for _ in range(20)]
+    queries += [f"{rng.choice(words)} {rng.choice(words)[:3]}" for _ in range(20)]
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        autocomplete.suggest(queries[i % len(queries)])
+    print(f"подсказка: {(time.perf_counter() - start) / repeat * 1e6:.1f} мкс в среднем")
+
+
+async def main(synthetic_count: int | None):
+    autocomplete = Autocomplete()
+    start = time.perf_counter()
+    if synthetic_count:
+        synthetic(autocomplete, synthetic_count)
+    else:
+        await autocomplete.refresh()
+    print(f"сборка: {time.perf_counter() - start:.1f} с\n")
+
+    print_report(autocomplete.memory_report())
+    measure_queries(autocomplete)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Память индекса подсказок")
+    parser.add_argument("--synthetic", type=int, help="Сгенерировать N книг вместо чтения БД")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.synthetic))
@@ -0,0 +1,90 @@
+"""Сравнение форматов кеша на реальных данных каталога.
+
+Для каждого сочетания сериализатор/сжатие печатает размер значения в Redis
+и время кодирования/декодирования для трёх типичных ключей:
+all_authors_sorted, страница жанра и чанк sitemap аудиокниг.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import select, func
+from app.database import async_session_maker
+from app.cache import SERIALIZERS, COMPRESSORS, encode_value, decode_value
+from app.models import Author, audiobook_genre
+from app.services.author_service import get_last_name
+from app.routes.sitemap import build_sitemap_audiobooks
+from app.services.genre_service import GenreService
+
+
+async def load_payloads() -> dict:
+    async with async_session_maker() as session:
+        result = await session.execute(select(Author))
+        authors = sorted(result.scalars().all(), key=lambda a: get_last_name(a.name).lower())
+        all_authors = [
+            {"id": a.id, "name": a.name, "slug": a.slug, "last_name": get_last_name(a.name)}
+            for a in authors
+        ]
+
+        # Самый большой жанр — худший случай для страницы жанра
+        genre_id = await session.scalar(
+            select(audiobook_genre.c.genre_id)
+            .group_by(audiobook_genre.c.genre_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        )
+        # __wrapped__ — исходный метод без кеша: нужны свежие данные из БД
+        genre_page = await GenreService.get_audiobooks_page_document.__wrapped__(
+            GenreService(session), genre_id=genre_id, page=1, limit=24
+        )
+
+        sitemap_chunk = await build_sitemap_audiobooks(session, 1)
+
+    return {
+        "all_authors_sorted": all_authors,
+        "genre_page": genre_page,
+        "sitemap_audiobooks_1": sitemap_chunk,
+    }
+
+
+def measure(value, serializer: str, compression: str, repeat: int) -> tuple[int, float, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        raw, _ = encode_value(value, 0, serializer=serializer, compression=compression)
+    encode_ms = (time.perf_counter() - start) / repeat * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decode_value(raw)
+    decode_ms = (time.perf_counter() - start) / repeat * 1000
+
+    return len(raw), encode_ms, decode_ms
+
+
+async def main(repeat: int):
+    payloads = await load_payloads()
+
+    print(f"{'ключ':<22} {'формат':<16} {'байт':>12} {'encode, мс':>11} {'decode, мс':>11}")
+    print("-" * 76)
+
+    for name, value in payloads.items():
+        # Строки (sitemap) всегда хранятся как есть, различается только сжатие
+        serializers = ["str"] if isinstance(value, str) else [s for s in SERIALIZERS if s not in ("str", "bytes")]
+        for serializer in serializers:
+            for compression in COMPRESSORS:
+                size, encode_ms, decode_ms = measure(value, serializer, compression, repeat)
+                print(f"{name:<22} {serializer + '+' + compression:<16} {size:>12,} {encode_ms:>11.3f} {decode_ms:>11.3f}")
+        print()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Бенчмарк форматов кеша")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов на измерение")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.repeat))
@@ -0,0 +1,123 @@
+"""Загрузчики страницы книги: p50/p99 и число запросов к БД.
+
+selectin — строка книги и selectinload авторов, жанров и всех изданий
+           с полными описаниями (загрузчик до отложенных описаний);
+split    — строка книги, selectinload авторов и жанров и отдельная
+           страница изданий (app/services/editions.py);
+single   — один запрос с json-агрегатами и LATERAL (app/services/book_detail.py).
+
+Книги — с наибольшим числом изданий (худший случай) и случайная выборка.
+Кеш не используется, каждый замер — новая сессия.
+"""
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import selectinload, undefer
+
+from app.database import async_session_maker, engine
+from app.models import Audiobook, TextBook, audiobook_textbook
+from app.services.audiobook_service import AudiobookService
+from app.services.book_detail import book_detail, load_detail_document
+from app.services.editions import EDITIONS_FIRST, editions_page
+
+statements = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+
+async def selectin_loader(session, slug: str):
+    result = await session.execute(
+        select(Audiobook)
+        .options(
+            selectinload(Audiobook.authors),
+            selectinload(Audiobook.genres),
+            # Описания изданий теперь отложены — загружаем их сразу, как раньше
+            selectinload(Audiobook.text_versions).options(undefer(TextBook.description)),
+        )
+        .where(Audiobook.slug == slug)
+    )
+    audiobook = result.scalar_one_or_none()
+    # Шаблон читал описание каждого издания
+    return audiobook, [book.description for book in audiobook.text_versions]
+
+
+async def split_loader(session, slug: str):
+    audiobook = await AudiobookService(session).get_by_slug(slug)
+    return audiobook, await editions_page(session, audiobook.id, 0, EDITIONS_FIRST)
+
+
+async def single_loader(session, slug: str):
+    return book_detail(await load_detail_document(session, slug))
+
+
+LOADERS = {"selectin": selectin_loader, "split": split_loader, "single": single_loader}
+
+
+async def pick_slugs(heavy: int, sample: int) -> dict[str, list[str]]:
+    async with async_session_maker() as session:
+        editions = func.count(audiobook_textbook.c.textbook_id)
+        result = await session.execute(
+            select(Audiobook.slug)
+            .join(audiobook_textbook, audiobook_textbook.c.audiobook_id == Audiobook.id)
+            .group_by(Audiobook.id)
+            .order_by(editions.desc())
+            .limit(heavy)
+        )
+        most_editions = list(result.scalars())
+        result = await session.execute(select(Audiobook.slug).order_by(func.random()).limit(sample))
+        return {"много изданий": most_editions, "случайные": list(result.scalars())}
+
+
+async def measure(loader, slugs: list[str], repeat: int) -> tuple[list[float], float]:
+    global statements
+    timings = []
+    statements = 0
+    for _ in range(repeat):
+        for slug in slugs:
+            async with async_session_maker() as session:
+                start = time.perf_counter()
+                await loader(session, slug)
+                timings.append((time.perf_counter() - start) * 1000)
+    return timings, statements / len(timings)
+
+
+def percentile(timings: list[float], p: int) -> float:
+    return statistics.quantiles(timings, n=100)[p - 1]
+
+
+async def main(heavy: int, sample: int, repeat: int):
+    groups = await pick_slugs(heavy, sample)
+
+    print(f"{'книги':<16} {'загрузчик':<10} {'p50, мс':>9} {'p99, мс':>9} {'запросов':>9}")
+    print("-" * 57)
+    for group, slugs in groups.items():
+        if not slugs:
+            continue
+        for name, loader in LOADERS.items():
+            # Прогрев: соединения пула, планы запросов
+            await measure(loader, slugs, 1)
+            timings, per_load = await measure(loader, slugs, repeat)
+            print(f"{group:<16} {name:<10} {percentile(timings, 50):>9.2f} {percentile(timings, 99):>9.2f} {per_load:>9.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Бенчмарк загрузчиков страницы книги")
+    parser.add_argument("--heavy", type=int, default=20, help="Книг с наибольшим числом изданий")
+    parser.add_argument("--sample", type=int, default=50, help="Случайных книг")
+    parser.add_argument("--repeat", type=int, default=10, help="Повторов на книгу")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.heavy, args.sample, args.repeat))
@@ -0,0 +1,104 @@
+"""Сравнение путей JSON API на списке книг из 24, 100 и 1000 карточек.
+
+orm   — полные ORM-объекты с selectinload и словари (путь до карточек);
+cards — проекция card_query, dataclass-карточки и JSONResponse
+        приложения (orjson без jsonable_encoder), как у роутов;
+raw   — документ целиком собирает Postgres (RawJsonService), ответ —
+        готовые байты.
+
+Кеш не используется: каждый замер — запрос к БД и сборка тела ответа.
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import literal, select, true
+from sqlalchemy.orm import selectinload
+
+from app.database import async_session_maker
+from app.models import Audiobook
+from app.responses import JSONResponse, RawJSONResponse
+from app.services.pagination import KEYSET_ORDER, seek
+from app.services.raw_json import RawJsonService
+
+
+async def orm_body(session, limit: int) -> bytes:
+    result = await session.execute(
+        select(Audiobook)
+        .options(selectinload(Audiobook.authors), selectinload(Audiobook.genres))
+        .order_by(*KEYSET_ORDER)
+        .limit(limit)
+    )
+    books = [
+        {
+            "id": book.id,
+            "name": book.name,
+            "slug": book.slug,
+            "image_url": book.image_url,
+            "price": float(book.price) if book.price else 0,
+            "fragment_url": book.fragment_url,
+            "formats": book.formats,
+            "authors": [{"name": a.name, "slug": a.slug} for a in book.authors],
+            "genres": [{"name": g.name, "slug": g.slug} for g in book.genres],
+        }
+        for book in result.scalars().all()
+    ]
+    return JSONResponse({"books": books, "total": 0}).body
+
+
+async def cards_body(session, limit: int) -> bytes:
+    page = await seek(session, true(), None, limit)
+    return JSONResponse({**page, "has_more": page["next_cursor"] is not None, "total": 0}).body
+
+
+async def raw_body(session, limit: int) -> bytes:
+    document = await RawJsonService(session).seek_document(true(), None, limit, literal(0))
+    return RawJSONResponse(document).body
+
+
+PATHS = {"orm": orm_body, "cards": cards_body, "raw": raw_body}
+
+
+async def measure(build, limit: int, repeat: int) -> tuple[float, int, bytes]:
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        # Новая сессия на замер: identity map не переносит объекты между прогонами
+        async with async_session_maker() as session:
+            start = time.perf_counter()
+            body = await build(session, limit)
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), len(body), body
+
+
+async def main(sizes: list[int], repeat: int):
+    print(f"{'книг':>6} {'путь':<6} {'медиана, мс':>12} {'байт':>10}")
+    print("-" * 38)
+
+    for limit in sizes:
+        bodies = {}
+        for name, build in PATHS.items():
+            # Прогрев: соединение, план запроса
+            await measure(build, limit, 1)
+            median_ms, size, body = await measure(build, limit, repeat)
+            bodies[name] = body
+            print(f"{limit:>6} {name:<6} {median_ms:>12.2f} {size:>10,}")
+
+        same = json.loads(bodies["cards"])["books"] == json.loads(bodies["raw"])["books"]
+        print(f"{'':>6} карточки cards и raw {'совпадают' if same else 'РАЗЛИЧАЮТСЯ'}\n")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Бенчмарк путей JSON API")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[24, 100, 1000], help="Размеры страниц")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов на замер")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.sizes, args.repeat))
@@ -0,0 +1,126 @@
+"""JSON-кодирование без БД: stdlib json (и jsonable_encoder) против app.encoding.
+
+Синтетические данные той же формы, что в каталоге: карточки книг с ценой
+Decimal и updated_at datetime, страница из 24 и 1000 карточек, описание
+книги для фильтра tojson. Для каждого случая — медиана на одно
+кодирование/декодирование в микросекундах.
+"""
+import json
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.encoding import dumps, dumps_str, encode_default, loads
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+
+@dataclass(slots=True)
+class Card:
+    """Как app.services.cards.Card, плюс updated_at для проверки datetime."""
+    id: int
+    name: str
+    slug: str
+    image_url: Optional[str]
+    price: Decimal
+    fragment_url: Optional[str]
+    formats: Optional[dict]
+    authors: list[dict]
+    genres: list[dict]
+    updated_at: datetime
+
+
+def make_cards(count: int) -> list[Card]:
+    start = datetime(2024, 1, 1)
+    return [
+        Card(
+            id=i,
+            name=f"Аудиокнига номер {i}: длинное русское название",
+            slug=f"audiokniga-nomer-{i}",
+            image_url=f"https://cv.litres.ru/pub/c/audiokniga/cover_415/{i}.jpg",
+            price=Decimal(f"{199 + i % 500}.{i % 100:02d}"),
+            fragment_url=f"https://www.litres.ru/get_mp3_trial/{i}.mp3",
+            formats={"mp3": True, "m4b": i % 2 == 0},
+            authors=[{"name": "Фёдор Достоевский", "slug": "fedor-dostoevskiy"}],
+            genres=[{"name": "Русская классика", "slug": "russkaya-klassika"}, {"name": "Романы", "slug": "romany"}],
+            updated_at=start + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def stdlib_default(value):
+    """То, что до общего кодировщика делали jsonable_encoder и json.dumps."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return asdict(value)
+
+
+def median_us(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(timings)
+
+
+def cases(repeat: int) -> list[tuple[str, str, float]]:
+    rows = []
+    for size in (24, 1000):
+        page = {"books": make_cards(size), "next_cursor": "AAYBGq1v2AAAAAAY", "has_more": True, "total": 52000}
+        encoded = dumps(page)
+        label = f"ответ API, {size} карточек"
+
+        if jsonable_encoder is not None:
+            rows.append((label, "jsonable_encoder + json", median_us(
+                lambda: json.dumps(jsonable_encoder(page), ensure_ascii=False).encode("utf-8"), repeat)))
+        rows.append((label, "json.dumps", median_us(
+            lambda: json.dumps(page, ensure_ascii=False, default=stdlib_default).encode("utf-8"), repeat)))
+        rows.append((label, "app.encoding.dumps", median_us(lambda: dumps(page), repeat)))
+
+        label = f"кеш, чтение {size} карточек"
+        rows.append((label, "json.loads", median_us(lambda: json.loads(encoded), repeat)))
+        rows.append((label, "app.encoding.loads", median_us(lambda: loads(encoded), repeat)))
+
+    description = "«Преступление и наказание» — социально-психологический роман. " * 40
+    rows.append(("tojson, описание книги", "json.dumps", median_us(lambda: json.dumps(description), repeat)))
+    rows.append(("tojson, описание книги", "app.encoding.dumps_str", median_us(lambda: dumps_str(description), repeat)))
+    return rows
+
+
+def check() -> None:
+    """Оба пути дают одинаковый документ: цена — число, updated_at — ISO 8601."""
+    page = {"books": make_cards(3)}
+    ours = json.loads(dumps(page))
+    theirs = json.loads(json.dumps(page, default=stdlib_default))
+    assert ours == theirs, "кодировщики расходятся"
+    assert ours["books"][1]["price"] == 200.01
+    assert ours["books"][1]["updated_at"] == "2024-01-01T00:01:00"
+    assert json.loads(json.dumps(Decimal("1.5"), default=encode_default)) == 1.5
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Бенчмарк JSON-кодировщика")
+    parser.add_argument("--repeat", type=int, default=200, help="Повторов на замер")
+    args = parser.parse_args()
+
+    check()
+    print(f"{'случай':<30} {'кодировщик':<26} {'медиана, мкс':>13}")
+    print("-" * 71)
+    for label, name, value in cases(args.repeat):
+        print(f"{label:<30} {name:<26} {value:>13.1f}")
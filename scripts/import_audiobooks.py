@@ -11,7 +11,9 @@ from sqlalchemy.dialects.postgresql import insert
 sys.path.append(str(Path(__file__).parent.parent))
 
 from app.database import async_session_maker, engine
-from app.models import Audiobook, Author, Genre, audiobook_author, audiobook_genre
+from app.cache import bump_catalog_generation
+from app.warmup import warm_cache
+from app.models import Audiobook, Author, Genre, audiobook_author, audiobook_genre, genre_closure
 from app.utils import slugify
 
 
@@ -40,9 +42,55 @@ async def optimize_for_bulk_load(session):
     await session.commit()
 
 
+async def refresh_search_vectors(session, batch_size: int = 5000):
+    """Пересчёт полнотекстового индекса для книг, загруженных без триггеров."""
+    while True:
+        result = await session.execute(
+            text("""
+                UPDATE audiobooks SET search_vector = audiobook_search_vector(id, name, description)
+                WHERE id IN (SELECT id FROM audiobooks WHERE search_vector IS NULL LIMIT :limit)
+            """),
+            {"limit": batch_size},
+        )
+        await session.commit()
+        if result.rowcount < batch_size:
+            break
+
+
+async def refresh_book_counts(session):
+    """Пересчёт genres.book_count и authors.book_count одним UPDATE на таблицу.
+
+    Жанр считает разные книги своего поддерева (по genre_closure), поэтому
+    книга, привязанная и к жанру, и к поджанру, учитывается один раз.
+    Строки без изменений не переписываются.
+    """
+    await session.execute(text("""
+        UPDATE authors a SET book_count = c.n
+        FROM (
+            SELECT au.id, count(aa.audiobook_id) AS n
+            FROM authors au LEFT JOIN audiobook_author aa ON aa.author_id = au.id
+            GROUP BY au.id
+        ) c
+        WHERE a.id = c.id AND a.book_count IS DISTINCT FROM c.n
+    """))
+    await session.execute(text("""
+        WITH counts AS (
+            SELECT gc.ancestor_id AS id, count(DISTINCT ag.audiobook_id) AS n
+            FROM genre_closure gc LEFT JOIN audiobook_genre ag ON ag.genre_id = gc.descendant_id
+            GROUP BY gc.ancestor_id
+        )
+        UPDATE genres g SET book_count = counts.n
+        FROM counts
+        WHERE g.id = counts.id AND g.book_count IS DISTINCT FROM counts.n
+    """))
+    await session.commit()
+
+
 async def restore_after_bulk_load(session):
     """Восстановление настроек после загрузки."""
     await session.execute(text("SET session_replication_role = DEFAULT"))
+    await refresh_search_vectors(session)
+    await refresh_book_counts(session)
     await session.execute(text("ANALYZE authors"))
     await session.execute(text("ANALYZE genres"))
     await session.execute(text("ANALYZE audiobooks"))
@@ -98,7 +146,11 @@ async def bulk_insert_authors(session, author_names: set) -> Dict[str, int]:
 
 
 async def bulk_insert_genres(session, categories: set) -> Dict[str, list]:
-    """Массовая вставка жанров."""
+    """Массовая вставка жанров и их строк в genre_closure.
+
+    Путь «A > B > C» известен целиком, поэтому новому жанру сразу
+    записываются все предки с глубиной — без рекурсивных запросов.
+    """
     result = await session.execute(select(Genre.id, Genre.name, Genre.parent_id))
     existing_genres = {}
     for genre_id, name, parent_id in result.fetchall():
@@ -111,6 +163,7 @@ async def bulk_insert_genres(session, categories: set) -> Dict[str, list]:
 
     genre_cache = {}
     new_genres = []
+    closure_rows = []
 
     for category in sorted(categories):
         genre_names = [g.strip() for g in category.split(">") if g.strip()]
@@ -153,12 +206,22 @@ async def bulk_insert_genres(session, categories: set) -> Dict[str, list]:
                 genre_id = genre.id
                 existing_genres[key] = genre_id
 
+                # genre_ids — предки нового жанра от корня
+                closure_rows.append({"ancestor_id": genre_id, "descendant_id": genre_id, "depth": 0})
+                closure_rows.extend(
+                    {"ancestor_id": ancestor_id, "descendant_id": genre_id, "depth": len(genre_ids) - i}
+                    for i, ancestor_id in enumerate(genre_ids)
+                )
+
             genre_ids.append(genre_id)
             parent_id = genre_id
 
         if genre_ids:  # Добавляем только если есть валидные жанры
             genre_cache[category] = genre_ids
 
+    # Пачками: у asyncpg не больше 32767 параметров на запрос
+    for i in range(0, len(closure_rows), 5000):
+        await session.execute(insert(genre_closure).values(closure_rows[i:i + 5000]).on_conflict_do_nothing())
     await session.commit()
     return genre_cache
 
@@ -180,6 +243,10 @@ async def bulk_upsert_audiobooks(session, batch: List[dict]) -> Dict[int, int]:
             "image_url": stmt.excluded.image_url,
             "formats": stmt.excluded.formats,
             "fragment_url": stmt.excluded.fragment_url,
+            # По updated_at индекс подсказок подгружает только изменённые книги
+            "updated_at": stmt.excluded.updated_at,
+            # Триггеры при загрузке выключены — пересчитаем после
+            "search_vector": None,
         }
     )
     await session.execute(stmt)
@@ -238,7 +305,7 @@ async def bulk_insert_relations(session, audiobook_ids: Dict[int, int], author_r
     await session.commit()
 
 
-async def import_csv_data(csv_file_path: str, batch_size: int = 1000):
+async def import_csv_data(csv_file_path: str, batch_size: int = 1000, warm: bool = True):
     # Отключаем SQLAlchemy логи для чистоты вывода
     import logging
     logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
@@ -349,9 +416,17 @@ async def import_csv_data(csv_file_path: str, batch_size: int = 1000):
         print("\nВосстановление настроек и ANALYZE...")
         await restore_after_bulk_load(session)
 
+    # Сбрасываем кеш сайта: все ключи переходят в новое поколение
+    generation = await bump_catalog_generation()
+    if generation is not None:
+        print(f"Поколение кеша каталога: {generation}")
+
     print(f"\nИмпорт завершён!")
     print(f"Обработано: {stats['processed']:,} | Ошибок: {stats['errors']:,}\n")
 
+    if warm:
+        await warm_cache()
+
 
 if __name__ == "__main__":
     import argparse
@@ -359,6 +434,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Импорт аудиокниг из CSV")
     parser.add_argument("--file", type=str, default="litresru.csv", help="Путь к CSV файлу")
     parser.add_argument("--batch-size", type=int, default=1000, help="Размер батча (по умолчанию 1000)")
+    parser.add_argument("--no-warm", action="store_true", help="Не прогревать кеш после импорта")
     args = parser.parse_args()
 
-    asyncio.run(import_csv_data(args.file, batch_size=args.batch_size))
+    asyncio.run(import_csv_data(args.file, batch_size=args.batch_size, warm=not args.no_warm))
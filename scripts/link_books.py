@@ -7,6 +7,7 @@ from sqlalchemy import text, select, func
 sys.path.append(str(Path(__file__).parent.parent))
 
 from app.database import async_session_maker
+from app.cache import bump_catalog_generation
 from app.models import Audiobook, TextBook, audiobook_textbook
 
 
@@ -61,6 +62,11 @@ async def link_versions():
 
         print(f"[OK] Sozdano novyh svyazej: {new_links:,}\n")
 
+        if new_links:
+            generation = await bump_catalog_generation()
+            if generation is not None:
+                print(f"[OK] Pokolenie kesha kataloga: {generation}\n")
+
         # Финальная статистика
         total_links = await session.scalar(select(func.count()).select_from(audiobook_textbook))
         audio_with_text = await session.scalar(
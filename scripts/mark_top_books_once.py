@@ -12,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy import select, update
 from app.database import async_session_maker
+from app.cache import invalidate_tag
 from app.models import Audiobook
 
 
@@ -46,6 +47,10 @@ async def mark_top_books():
 
         print(f"✓ Помечено {result.rowcount} топовых аудиокниг")
 
+        # Флаг is_top влияет только на главную и /api/top-books
+        if await invalidate_tag("top_books") is not None:
+            print("✓ Кеш топовых книг сброшен")
+
         # Проверка
         query = select(Audiobook).where(Audiobook.is_top == True)
         result = await session.execute(query)
@@ -0,0 +1,34 @@
+"""Прогрев кеша горячих страниц.
+
+Запускать после импорта (import_audiobooks.py, link_books.py,
+mark_top_books_once.py) или деплоя, чтобы первые посетители не ждали БД.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.warmup import warm_cache
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Прогрев кеша каталога")
+    parser.add_argument("--genres", type=int, default=settings.cache_warmup_genres, help="Сколько крупнейших жанров")
+    parser.add_argument("--authors", type=int, default=settings.cache_warmup_authors, help="Сколько крупнейших авторов")
+    parser.add_argument("--pages", type=int, default=settings.cache_warmup_pages, help="Страниц на жанр/автора")
+    parser.add_argument("--concurrency", type=int, default=settings.cache_warmup_concurrency, help="Одновременных загрузок")
+    parser.add_argument("--queries", type=int, default=settings.cache_warmup_queries, help="Сколько популярных запросов")
+    args = parser.parse_args()
+
+    stats = asyncio.run(warm_cache(
+        genres=args.genres,
+        authors=args.authors,
+        pages=args.pages,
+        concurrency=args.concurrency,
+        queries=args.queries,
+    ))
+    sys.exit(1 if stats["failed"] else 0)
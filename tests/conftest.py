@@ -0,0 +1,5 @@
+import os
+
+# Settings требует эти переменные при импорте app; тестам база не нужна
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://test@localhost/test")
+os.environ.setdefault("SECRET_KEY", "test")
@@ -0,0 +1,27 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.pagination import decode_cursor, encode_cursor, page_number, seek
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 12, 30, 1, 250)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", [None, "", "not base64!", "AAAA", "QAAAAAAAAAAAAAAB"])
+def test_decode_cursor_rejects_bad_cursor(cursor):
+    assert decode_cursor(cursor) is None
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_seek_rejects_non_positive_limit(limit):
+    with pytest.raises(ValueError):
+        asyncio.run(seek(None, True, limit=limit))
+
+
+@pytest.mark.parametrize("value, page", [("3", 3), (None, 1), ("", 1), ("abc", 1), ("0", 1), ("-5", 1)])
+def test_page_number(value, page):
+    assert page_number(value) == page